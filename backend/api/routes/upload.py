@@ -1,6 +1,7 @@
 """
 文件上传API路由
 """
+import asyncio
 import uuid
 from pathlib import Path
 from typing import List
@@ -24,12 +25,16 @@ from services.db import (
     save_json_config,
     list_uploaded_files,
     delete_uploaded_file,
+    sha256_hex,
 )
 import json
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# 通道分析服务（模块级共享，复用其文件分析缓存）
+analysis_service = ChannelAnalysisService()
+
 # 允许的文件扩展名
 ALLOWED_EXTENSIONS = settings.ALLOWED_EXTENSIONS.split(',')
 ALLOWED_EXTENSIONS = [ext.strip() for ext in ALLOWED_EXTENSIONS]
@@ -80,6 +85,9 @@ async def upload_file(file: UploadFile = File(...)):
         file_id = str(uuid.uuid4())
         file_ext = Path(file.filename).suffix.lower()
 
+        # SHA-256 在线程池中计算，与写临时文件重叠；通道分析按内容哈希命中缓存，入库时直接传入
+        sha256_future = asyncio.get_running_loop().run_in_executor(None, sha256_hex, file_content)
+
         # 将文件内容写入临时文件以便复用现有分析逻辑
         with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp:
             tmp.write(file_content)
@@ -87,10 +95,10 @@ async def upload_file(file: UploadFile = File(...)):
 
         logger.info(f"文件上传成功: {file.filename} -> {file_id}")
 
-        # 自动进行通道分析
-        analysis_service = ChannelAnalysisService()
+        # 自动进行通道分析（重复上传相同内容时直接复用分析结果）
+        sha256 = await sha256_future
         try:
-            analysis_result = analysis_service.analyze_file(str(temp_path))
+            analysis_result = analysis_service.analyze_file(str(temp_path), content_sha256=sha256)
         finally:
             temp_path.unlink(missing_ok=True)
         
@@ -107,6 +115,7 @@ async def upload_file(file: UploadFile = File(...)):
             content=file_content,
             category=category,
             content_type=content_type,
+            sha256=sha256,
         )
 
         # 构建响应数据
@@ -3,7 +3,7 @@ LLM配置管理
 """
 
 from typing import Dict, Any, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from enum import Enum
 
 
@@ -47,11 +47,12 @@ class LLMConfig(BaseModel):
     stream: bool = Field(False, description="是否流式输出")
     custom_headers: Dict[str, str] = Field(default_factory=dict, description="自定义请求头")
     
-    class Config:
-        use_enum_values = True
-        json_encoders = {
+    model_config = ConfigDict(
+        use_enum_values=True,
+        json_encoders={
             ModelProvider: lambda v: v.value
-        }
+        },
+    )
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
@@ -3,7 +3,7 @@ LLM模型定义
 """
 
 from typing import List, Dict, Any, Optional, Union
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from enum import Enum
 from datetime import datetime
 
@@ -21,8 +21,7 @@ class Message(BaseModel):
     content: str = Field(..., description="消息内容")
     name: Optional[str] = Field(None, description="消息发送者名称")
     
-    class Config:
-        use_enum_values = True
+    model_config = ConfigDict(use_enum_values=True)
 
 
 class ChatRequest(BaseModel):
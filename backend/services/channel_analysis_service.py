@@ -3,8 +3,11 @@
 """
 import pandas as pd
 import numpy as np
+import copy
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,15 +15,25 @@ logger = logging.getLogger(__name__)
 class ChannelAnalysisService:
     """通道分析服务类"""
     
+    # 分析结果缓存上限（按LRU淘汰）
+    CACHE_MAX_ENTRIES = 64
+
     def __init__(self):
         self.time_columns = ['time', 'time[s]', 'Time', 'Time[s]', 'timestamp', 'Timestamp', 't', 'T']
+        # 分析结果缓存：(内容SHA-256, 扩展名) -> 分析结果
+        # 上传路由每次都分析新建的临时文件，路径/修改时间不会重复，只能按内容识别同一文件
+        self._cache: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
     
-    def analyze_file(self, file_path: str) -> Dict[str, Any]:
+    def analyze_file(self, file_path: str, content_sha256: Optional[str] = None) -> Dict[str, Any]:
         """
         分析文件中的通道数据
         
+        传入文件内容的 SHA-256 时，相同内容（且扩展名相同）重复分析直接返回缓存结果
+        
         Args:
             file_path: 文件路径
+            content_sha256: 文件内容的十六进制 SHA-256（可选，不传则不使用缓存）
             
         Returns:
             包含通道分析结果的字典
@@ -31,6 +44,17 @@ class ChannelAnalysisService:
             if not file_path_obj.exists():
                 raise FileNotFoundError(f"文件不存在: {file_path}")
             
+            cache_key = (content_sha256, file_path_obj.suffix.lower()) if content_sha256 else None
+            if cache_key is not None:
+                with self._cache_lock:
+                    cached = self._cache.get(cache_key)
+                    if cached is not None:
+                        self._cache.move_to_end(cache_key)
+                        logger.info(f"命中文件分析缓存: {file_path_obj.name}")
+                        cached = copy.deepcopy(cached)
+                        cached["file_info"]["filename"] = file_path_obj.name
+                        return cached
+            
             # 根据文件扩展名选择读取方法
             if file_path_obj.suffix.lower() == '.csv':
                 df = pd.read_csv(file_path)
@@ -49,11 +73,14 @@ class ChannelAnalysisService:
             if not channel_columns:
                 raise ValueError("未找到有效的通道数据列")
             
+            # 一次性将所有通道列转换为数值
+            numeric_df = self._to_numeric_frame(df, channel_columns)
+            
             # 分析每个通道
             channel_stats = []
             for channel in channel_columns:
                 try:
-                    stats = self._analyze_channel(df, channel)
+                    stats = self._analyze_channel(numeric_df, channel)
                     if stats:
                         channel_stats.append(stats)
                 except Exception as e:
@@ -63,7 +90,7 @@ class ChannelAnalysisService:
             if not channel_stats:
                 raise ValueError("没有找到有效的通道数据")
             
-            return {
+            result = {
                 "success": True,
                 "total_channels": len(channel_stats),
                 "channels": channel_stats,
@@ -74,6 +101,15 @@ class ChannelAnalysisService:
                 }
             }
             
+            # 仅缓存成功的分析结果
+            if cache_key is not None:
+                with self._cache_lock:
+                    self._cache[cache_key] = copy.deepcopy(result)
+                    if len(self._cache) > self.CACHE_MAX_ENTRIES:
+                        self._cache.popitem(last=False)
+            
+            return result
+            
         except Exception as e:
             logger.error(f"文件分析失败: {str(e)}")
             return {
@@ -98,11 +134,20 @@ class ChannelAnalysisService:
         
         return channel_columns
     
+    def _to_numeric_frame(self, df: pd.DataFrame, channel_columns: List[str]) -> pd.DataFrame:
+        """将通道列转换为float64数值表（无法转换的值置为NaN）"""
+        try:
+            # 常见情况下数据已是数值，整体一次类型转换即可
+            return df[channel_columns].astype(np.float64, copy=False)
+        except (TypeError, ValueError):
+            # 存在非数值内容时逐列容错转换
+            return df[channel_columns].apply(pd.to_numeric, errors='coerce')
+    
     def _analyze_channel(self, df: pd.DataFrame, channel_name: str) -> Optional[Dict[str, Any]]:
-        """分析单个通道的统计数据"""
+        """分析单个通道的统计数据（df为已转换为数值的通道表）"""
         try:
             # 获取数值数据，排除NaN值
-            data = pd.to_numeric(df[channel_name], errors='coerce').dropna()
+            data = df[channel_name].dropna()
             
             if len(data) == 0:
                 logger.warning(f"通道 {channel_name} 没有有效数据")
@@ -1,14 +1,16 @@
 """
 合并报表服务 - 生成稳态、功能计算、状态评估三张表并合并到一个Excel
 """
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 import uuid
 import logging
 
 from openpyxl import Workbook, load_workbook
-from openpyxl.worksheet.worksheet import Worksheet
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
 
 from backend.services.steady_state_service import SteadyStateService
 from backend.services.functional_service import FunctionalService
@@ -16,14 +18,47 @@ from backend.services.status_evaluation_service import StatusEvaluationService
 
 logger = logging.getLogger(__name__)
 
+# 合并报表样式（模块级共享，write_only模式下逐单元格挂载）
+TITLE_FONT = Font(name="SimHei", size=12, bold=True)
+SECTION_FONT = Font(size=12, bold=True)
+HEADER_FONT = Font(bold=True)
+CENTER = Alignment(horizontal='center', vertical='center')
+LEFT = Alignment(horizontal='left', vertical='center')
+HEADER_FILL = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+_THIN = Side(style="thin", color="000000")
+BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+# 表格数据行命名样式：居中 + 细边框（按名称注册到工作簿，单元格只引用样式名）
+BODY_STYLE_NAME = "dria_body"
+YES_NO_FILLS = {
+    "是": PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid"),  # 绿色
+    "否": PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid"),  # 红色
+}
+
+
+# 子服务及其 DataReader/ReportWriter 只在调用的局部变量中保存单次报表的数据（工作簿、计算器等），
+# 可被并发调用，因此模块内共享单例，避免每次生成合并报表都重新构造
+@lru_cache(maxsize=None)
+def _steady_service() -> SteadyStateService:
+    return SteadyStateService()
+
+
+@lru_cache(maxsize=None)
+def _functional_service() -> FunctionalService:
+    return FunctionalService()
+
+
+@lru_cache(maxsize=None)
+def _status_eval_service() -> StatusEvaluationService:
+    return StatusEvaluationService()
+
 
 class CombinedReportService:
     """合并报表服务"""
 
     def __init__(self):
-        self.steady_service = SteadyStateService()
-        self.functional_service = FunctionalService()
-        self.status_eval_service = StatusEvaluationService()
+        self.steady_service = _steady_service()
+        self.functional_service = _functional_service()
+        self.status_eval_service = _status_eval_service()
 
     def generate_all_and_merge(
         self,
@@ -48,95 +83,87 @@ class CombinedReportService:
         status_eval_tmp = tmp_dir / "status_eval.xlsx"
 
         logger.info("开始生成三类报表（独立xlsx）...")
-        # 稳态
-        self.steady_service.generate_report(steady_config_path, input_file_path, str(steady_tmp))
-        # 功能计算（获取计算结果）
-        functional_results = None
-        try:
-            result = self.functional_service.generate_report(functional_config_path, input_file_path, str(functional_tmp))
-            # 如果返回的是字典，提取calculator
-            if isinstance(result, dict):
-                calculator = result.get('calculator')
-                if calculator and hasattr(calculator, 'results'):
-                    functional_results = calculator.results
-                    logger.info(f"获取到功能计算结果，共{len(functional_results)}条记录")
-        except Exception as e:
-            logger.warning(f"功能计算生成失败或无法获取结果: {e}")
-            # 回退到简单接口
-            try:
-                self.functional_service.generate_report_simple(functional_config_path, input_file_path, str(functional_tmp))
-            except Exception:
-                pass
+        # 稳态与功能计算互不依赖，并行生成；状态评估依赖功能计算结果，随后执行
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            steady_future = executor.submit(
+                self.steady_service.generate_report, steady_config_path, input_file_path, str(steady_tmp)
+            )
+            functional_future = executor.submit(
+                self._generate_functional, functional_config_path, input_file_path, functional_tmp
+            )
+            steady_future.result()
+            functional_results = functional_future.result()
         # 状态评估（传递功能计算结果）
         self.status_eval_service.generate_report(status_eval_config_path, input_file_path, str(status_eval_tmp), functional_results)
 
         logger.info("三类报表生成完成，开始合并为单一xlsx（单sheet，纵向拼接）...")
-        # 创建目标工作簿（单个sheet）
-        merged_wb = Workbook()
-        ws = merged_wb.active
-        ws.title = "合并报表"
-
-        # 依次将三个文件的首个工作表数据纵向拼接到同一个sheet
-        current_row = 1
-
-        # 总抬头
-        title_cell = ws.cell(row=current_row, column=1, value="XX车台XX型号XX号机动态试验数据报表")
-        # 12号 黑体 加粗
-        title_cell.font = Font(name="SimHei", size=12, bold=True)
-        title_cell.alignment = Alignment(horizontal='center', vertical='center')
-        current_row += 2  # 空一行分隔
-
-        def append_section(title: str, src_path: Path, start_row: int) -> int:
+        # 创建目标工作簿（单个sheet，write_only模式：逐行流式写入，不在内存中保留单元格对象）
+        merged_wb = Workbook(write_only=True)
+        ws = merged_wb.create_sheet("合并报表")
+        merged_wb.add_named_style(NamedStyle(name=BODY_STYLE_NAME, alignment=CENTER, border=BORDER))
+
+        def make_cell(value, font=None, alignment=None, fill=None, border=None) -> WriteOnlyCell:
+            # write_only模式下样式必须在append之前挂到单元格上
+            cell = WriteOnlyCell(ws, value=value)
+            if font is not None:
+                cell.font = font
+            if alignment is not None:
+                cell.alignment = alignment
+            if fill is not None:
+                cell.fill = fill
+            if border is not None:
+                cell.border = border
+            return cell
+
+        # 总抬头（12号 黑体 加粗）
+        ws.append([make_cell("XX车台XX型号XX号机动态试验数据报表", font=TITLE_FONT, alignment=CENTER)])
+        ws.append([])  # 空一行分隔
+
+        def append_section(title: str, src_path: Path):
             # 标题行
-            title_cell = ws.cell(row=start_row, column=1, value=title)
-            title_cell.font = Font(size=12, bold=True)
-            title_cell.alignment = Alignment(horizontal='left', vertical='center')
-            next_row = start_row + 1
+            ws.append([make_cell(title, font=SECTION_FONT, alignment=LEFT)])
             # 复制数据
-            src_wb = load_workbook(str(src_path), data_only=True)
-            src_ws: Worksheet = src_wb.worksheets[0]
-            max_col = src_ws.max_column
-            rows_copied = 0
-            for row in src_ws.iter_rows(values_only=True):
-                for col_idx, cell_val in enumerate(row, start=1):
-                    ws.cell(row=next_row, column=col_idx, value=cell_val)
-                next_row += 1
-                rows_copied += 1
-            # 第一行（表头）样式：加粗、居中、背景色
-            if next_row > start_row + 1:
-                header_row_index = start_row + 1
-                for c in range(1, max_col + 1):
-                    cell = ws.cell(row=header_row_index, column=c)
-                    cell.font = Font(bold=True)
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
-                    cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-                # 只对该表格区域加细边框（包括表头+数据行）
-                thin = Side(style="thin", color="000000")
-                border = Border(left=thin, right=thin, top=thin, bottom=thin)
-                first_row = header_row_index
-                last_row = header_row_index + rows_copied - 1
-                for r in range(first_row, last_row + 1):
-                    for c in range(1, max_col + 1):
-                        cell = ws.cell(row=r, column=c)
-                        cell.border = border
-                        # 表格所有填写内容居中
-                        cell.alignment = Alignment(horizontal='center', vertical='center')
-                        # 仅对“表3 状态评估表”的数据行进行是/否底色标记
-                        if "状态评估" in title and r > header_row_index:
-                            val = cell.value
-                            if isinstance(val, str):
-                                text = val.strip()
-                                if text == "是":
-                                    cell.fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")  # 绿色
-                                elif text == "否":
-                                    cell.fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")  # 红色
-            # 空一行分隔
-            next_row += 1
-            return next_row
-
-        current_row = append_section("表1 稳定状态各动态参数汇总表", steady_tmp, current_row)
-        current_row = append_section("表2 功能计算汇总表", functional_tmp, current_row)
-        current_row = append_section("表3 状态评估表", status_eval_tmp, current_row)
+            src_wb = load_workbook(str(src_path), read_only=True, data_only=True)
+            try:
+                src_ws = src_wb.worksheets[0]
+                if src_ws.max_column is None:
+                    # 只写模式生成的文件不含 dimension 记录，需扫描一遍求出列数
+                    src_ws.calculate_dimension(force=True)
+                max_col = src_ws.max_column
+                # 仅对“表3 状态评估表”的数据行进行是/否底色标记
+                mark_yes_no = "状态评估" in title
+                for row_idx, row in enumerate(src_ws.iter_rows(values_only=True)):
+                    values = list(row) + [None] * (max_col - len(row))
+                    if row_idx == 0:
+                        # 第一行（表头）样式：加粗、居中、背景色、细边框
+                        ws.append([
+                            make_cell(v, font=HEADER_FONT, alignment=CENTER, fill=HEADER_FILL, border=BORDER)
+                            for v in values
+                        ])
+                        continue
+                    # 数据行：细边框，所有填写内容居中（命名样式）
+                    cells = []
+                    for v in values:
+                        cell = WriteOnlyCell(ws, value=v)
+                        cell.style = BODY_STYLE_NAME
+                        if mark_yes_no and isinstance(v, str):
+                            fill = YES_NO_FILLS.get(v.strip())
+                            if fill is not None:
+                                cell.fill = fill
+                        cells.append(cell)
+                    ws.append(cells)
+            finally:
+                src_wb.close()
+
+        sections = [
+            ("表1 稳定状态各动态参数汇总表", steady_tmp),
+            ("表2 功能计算汇总表", functional_tmp),
+            ("表3 状态评估表", status_eval_tmp),
+        ]
+        for idx, (title, src_path) in enumerate(sections):
+            if idx > 0:
+                ws.append([])  # 空一行分隔
+            append_section(title, src_path)
 
         # 不对整张表设置边框，只保留各表格区域边框
 
@@ -153,6 +180,26 @@ class CombinedReportService:
 
         return str(output_path)
 
+    def _generate_functional(self, functional_config_path: str, input_file_path: str, functional_tmp: Path) -> Optional[list]:
+        """生成功能计算汇总表，返回计算结果（供状态评估使用），失败时回退到简单接口并返回None"""
+        functional_results = None
+        try:
+            result = self.functional_service.generate_report(functional_config_path, input_file_path, str(functional_tmp))
+            # 如果返回的是字典，提取calculator
+            if isinstance(result, dict):
+                calculator = result.get('calculator')
+                if calculator and hasattr(calculator, 'results'):
+                    functional_results = calculator.results
+                    logger.info(f"获取到功能计算结果，共{len(functional_results)}条记录")
+        except Exception as e:
+            logger.warning(f"功能计算生成失败或无法获取结果: {e}")
+            # 回退到简单接口
+            try:
+                self.functional_service.generate_report_simple(functional_config_path, input_file_path, str(functional_tmp))
+            except Exception:
+                pass
+        return functional_results
+
     # 方案A不再需要新增sheet复制的方法，保留占位以便未来扩展（多sheet方案B）
     def _append_first_sheet_as_new(self, src_wb, dst_wb: Workbook, new_title: Optional[str] = None):
         pass
@@ -2,11 +2,21 @@
 配置对话解析服务 - 混合解析系统
 """
 import re
-from typing import Dict, Any, Optional, List
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, FrozenSet, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass(frozen=True, slots=True)
+class ParseCtx:
+    """单次解析的预处理结果（小写去空白文本 + 命中的关键词集合），在各解析步骤间共享"""
+    text: str
+    hits: FrozenSet[str]
+
+
 class ConfigDialogueParser:
     """配置对话解析器 - 混合解析系统"""
     
@@ -61,8 +71,83 @@ class ConfigDialogueParser:
                     "秒": ["秒", "sec", "second"],
                     "小时": ["小时", "hour", "h"]
                 }
+            },
+            # 操作指令相关
+            "action": {
+                "confirm_words": ["确认", "完成", "好了", "可以", "确定", "ok", "yes"],
+                "cancel_words": ["取消", "退出", "不要", "算了", "no", "cancel"],
+                "reset_words": ["重置", "重新", "reset", "重新开始"]
             }
         }
+        
+        # 预编译数值提取正则（原始模式字符串保留在field_mappings中）
+        self._threshold_re = re.compile(self.field_mappings["threshold"]["value_pattern"])
+        self._time_window_re = re.compile(self.field_mappings["time_window"]["value_pattern"])
+        
+        # 关键词集合：结构与field_mappings一致，列表转为frozenset，供命中集合做交集判断
+        self._keyword_sets = self._freeze_keywords(self.field_mappings)
+        
+        # 通道解析分派表：(通道关键词, 启用词, 禁用词, 配置字段, 显示名称)，按解析优先级排列
+        self._channel_dispatch = [
+            (
+                self._keyword_sets[channel_type]["keywords"],
+                self._keyword_sets[channel_type]["enable_words"],
+                self._keyword_sets[channel_type]["disable_words"],
+                field_name,
+                self.field_mappings[channel_type]["keywords"][0],
+            )
+            for channel_type, field_name in (
+                ("rpm_channel", "use_rpm_channel"),
+                ("temperature_channel", "use_temperature_channel"),
+                ("pressure_channel", "use_pressure_channel"),
+            )
+        ]
+        
+        # 关键词扫描器：一次扫描得到文本中出现的全部关键词
+        self._build_keyword_scanner()
+        
+        # 规则解析结果缓存：规则解析只依赖输入文本（不读取current_config），映射表初始化后不再变化
+        self._rule_parse_cached = lru_cache(maxsize=1024)(self._rule_parse_text)
+    
+    @classmethod
+    def _freeze_keywords(cls, node: Dict[str, Any]) -> Dict[str, Any]:
+        """将映射中的关键词列表转换为frozenset（保留字典层级与顺序，忽略非关键词项）"""
+        frozen = {}
+        for key, value in node.items():
+            if isinstance(value, dict):
+                frozen[key] = cls._freeze_keywords(value)
+            elif isinstance(value, list):
+                frozen[key] = frozenset(value)
+        return frozen
+    
+    def _build_keyword_scanner(self):
+        """
+        基于field_mappings中的全部关键词构建一次性扫描器
+        
+        在每个位置用前瞻匹配取最长关键词（候选按长度降序排列），
+        再展开为该关键词所包含的全部关键词，结果与逐个 `keyword in text` 判断一致。
+        """
+        keywords = set()
+        
+        def collect(node):
+            if isinstance(node, dict):
+                for value in node.values():
+                    collect(value)
+            elif isinstance(node, list):
+                keywords.update(node)
+        
+        collect(self.field_mappings)
+        ordered = sorted(keywords, key=len, reverse=True)
+        self._keyword_re = re.compile("(?=(" + "|".join(re.escape(k) for k in ordered) + "))")
+        # 每个关键词 -> 它包含的全部关键词（含自身）
+        self._keyword_closure = {kw: frozenset(k for k in keywords if k in kw) for kw in keywords}
+    
+    def _scan_keywords(self, text: str) -> FrozenSet[str]:
+        """扫描文本，返回出现的关键词集合"""
+        hits = set()
+        for match in self._keyword_re.finditer(text):
+            hits |= self._keyword_closure[match.group(1)]
+        return frozenset(hits)
     
     def parse_user_intent(self, user_input: str, current_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -77,9 +162,10 @@ class ConfigDialogueParser:
         """
         user_input_lower = user_input.lower().strip()
         
-        # 第一步：规则解析（快速、准确）
-        parsed_action = self._rule_based_parser(user_input_lower, current_config)
-        if parsed_action:
+        # 第一步：规则解析（快速、准确；相同输入直接命中缓存）
+        cached_items = self._rule_parse_cached(user_input_lower)
+        if cached_items:
+            parsed_action = dict(cached_items)
             logger.info(f"规则解析成功: {parsed_action}")
             return parsed_action
         
@@ -93,85 +179,81 @@ class ConfigDialogueParser:
         logger.warning(f"无法解析用户输入: {user_input}")
         return None
     
-    def _rule_based_parser(self, text: str, config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """基于关键词的快速解析"""
+    def _rule_parse_text(self, text: str) -> Optional[Tuple[Tuple[str, Any], ...]]:
+        """对已小写去空白的文本执行规则解析，结果转为可缓存的不可变元组"""
+        # 预处理只做一次：小写文本 + 关键词扫描
+        ctx = ParseCtx(text=text, hits=self._scan_keywords(text))
+        parsed_action = self._rule_based_parser(ctx)
+        return tuple(parsed_action.items()) if parsed_action else None
+    
+    def _rule_based_parser(self, ctx: ParseCtx) -> Optional[Dict[str, Any]]:
+        """基于关键词的快速解析（各解析步骤只对ctx.hits做集合判断）"""
         
         # 优先解析转速类型（避免包含“选择 Ng 转速通道”时只命中开启转速通道）
-        rpm_type_result = self._parse_rpm_type(text)
+        rpm_type_result = self._parse_rpm_type(ctx)
         if rpm_type_result:
             return rpm_type_result
 
-        # 解析转速通道
-        rpm_result = self._parse_channel_config(text, "rpm_channel", "use_rpm_channel")
-        if rpm_result:
-            return rpm_result
-        
-        # 解析温度通道
-        temp_result = self._parse_channel_config(text, "temperature_channel", "use_temperature_channel")
-        if temp_result:
-            return temp_result
-        
-        # 解析压力通道
-        pressure_result = self._parse_channel_config(text, "pressure_channel", "use_pressure_channel")
-        if pressure_result:
-            return pressure_result
+        # 解析转速/温度/压力通道（按分派表顺序，命中即返回）
+        channel_result = self._parse_channel_config(ctx)
+        if channel_result:
+            return channel_result
         
         # 解析阈值
-        threshold_result = self._parse_threshold(text)
+        threshold_result = self._parse_threshold(ctx)
         if threshold_result:
             return threshold_result
 
         # 解析统计方法
-        method_result = self._parse_statistical_method(text)
+        method_result = self._parse_statistical_method(ctx)
         if method_result:
             return method_result
         
         # 解析时间窗口
-        time_result = self._parse_time_window(text)
+        time_result = self._parse_time_window(ctx)
         if time_result:
             return time_result
         
         # 解析确认/取消操作
-        action_result = self._parse_action(text)
+        action_result = self._parse_action(ctx)
         if action_result:
             return action_result
         
         return None
     
-    def _parse_channel_config(self, text: str, channel_type: str, field_name: str) -> Optional[Dict[str, Any]]:
-        """解析通道配置"""
-        channel_config = self.field_mappings[channel_type]
-        
-        # 检查是否包含通道关键词
-        if not any(keyword in text for keyword in channel_config["keywords"]):
-            return None
-        
-        # 检查启用/禁用关键词
-        if any(word in text for word in channel_config["enable_words"]):
-            return {
-                "action": "update",
-                "field": field_name,
-                "value": True,
-                "message": f"已为您选择{channel_config['keywords'][0]}通道"
-            }
-        elif any(word in text for word in channel_config["disable_words"]):
-            return {
-                "action": "update",
-                "field": field_name,
-                "value": False,
-                "message": f"已为您取消{channel_config['keywords'][0]}通道"
-            }
+    def _parse_channel_config(self, ctx: ParseCtx) -> Optional[Dict[str, Any]]:
+        """解析通道配置（单次遍历通道分派表）"""
+        for keywords, enable_words, disable_words, field_name, display_name in self._channel_dispatch:
+            # 检查是否包含通道关键词
+            if ctx.hits.isdisjoint(keywords):
+                continue
+            
+            # 检查启用/禁用关键词
+            if not ctx.hits.isdisjoint(enable_words):
+                return {
+                    "action": "update",
+                    "field": field_name,
+                    "value": True,
+                    "message": f"已为您选择{display_name}通道"
+                }
+            elif not ctx.hits.isdisjoint(disable_words):
+                return {
+                    "action": "update",
+                    "field": field_name,
+                    "value": False,
+                    "message": f"已为您取消{display_name}通道"
+                }
         
         return None
 
-    def _parse_rpm_type(self, text: str) -> Optional[Dict[str, Any]]:
+    def _parse_rpm_type(self, ctx: ParseCtx) -> Optional[Dict[str, Any]]:
         """解析转速类型（Ng/Np）"""
-        rpm_type_config = self.field_mappings["rpm_type"]
-        if not any(keyword in text for keyword in rpm_type_config["keywords"]):
+        rpm_type_sets = self._keyword_sets["rpm_type"]
+        if ctx.hits.isdisjoint(rpm_type_sets["keywords"]):
             return None
 
-        is_ng = any(word in text for word in rpm_type_config["ng_words"])
-        is_np = any(word in text for word in rpm_type_config["np_words"])
+        is_ng = not ctx.hits.isdisjoint(rpm_type_sets["ng_words"])
+        is_np = not ctx.hits.isdisjoint(rpm_type_sets["np_words"])
 
         if is_ng and not is_np:
             return {
@@ -189,17 +271,14 @@ class ConfigDialogueParser:
             }
         return None
     
-    def _parse_threshold(self, text: str) -> Optional[Dict[str, Any]]:
+    def _parse_threshold(self, ctx: ParseCtx) -> Optional[Dict[str, Any]]:
         """解析阈值设置"""
-        threshold_config = self.field_mappings["threshold"]
-        
         # 检查是否包含阈值关键词
-        if not any(keyword in text for keyword in threshold_config["keywords"]):
+        if ctx.hits.isdisjoint(self._keyword_sets["threshold"]["keywords"]):
             return None
         
         # 提取数值
-        pattern = threshold_config["value_pattern"]
-        match = re.search(pattern, text)
+        match = self._threshold_re.search(ctx.text)
         if match:
             value = float(match.group(1))
             return {
@@ -211,17 +290,17 @@ class ConfigDialogueParser:
         
         return None
     
-    def _parse_statistical_method(self, text: str) -> Optional[Dict[str, Any]]:
+    def _parse_statistical_method(self, ctx: ParseCtx) -> Optional[Dict[str, Any]]:
         """解析统计方法"""
-        method_config = self.field_mappings["statistical_method"]
+        method_sets = self._keyword_sets["statistical_method"]
         
         # 检查是否包含统计方法关键词
-        if not any(keyword in text for keyword in method_config["keywords"]):
+        if ctx.hits.isdisjoint(method_sets["keywords"]):
             return None
         
         # 检查具体的方法值
-        for method_name, keywords in method_config["values"].items():
-            if any(keyword in text for keyword in keywords):
+        for method_name, keywords in method_sets["values"].items():
+            if not ctx.hits.isdisjoint(keywords):
                 return {
                     "action": "update",
                     "field": "statistical_method",
@@ -231,24 +310,23 @@ class ConfigDialogueParser:
         
         return None
     
-    def _parse_time_window(self, text: str) -> Optional[Dict[str, Any]]:
+    def _parse_time_window(self, ctx: ParseCtx) -> Optional[Dict[str, Any]]:
         """解析时间窗口"""
-        time_config = self.field_mappings["time_window"]
+        time_sets = self._keyword_sets["time_window"]
         
         # 检查是否包含时间关键词
-        if not any(keyword in text for keyword in time_config["keywords"]):
+        if ctx.hits.isdisjoint(time_sets["keywords"]):
             return None
         
         # 提取数值
-        pattern = time_config["value_pattern"]
-        match = re.search(pattern, text)
+        match = self._time_window_re.search(ctx.text)
         if match:
             value = int(match.group(1))
             
             # 检查单位
             unit = "分钟"  # 默认单位
-            for unit_name, keywords in time_config["units"].items():
-                if any(keyword in text for keyword in keywords):
+            for unit_name, keywords in time_sets["units"].items():
+                if not ctx.hits.isdisjoint(keywords):
                     unit = unit_name
                     break
             
@@ -262,27 +340,26 @@ class ConfigDialogueParser:
         
         return None
     
-    def _parse_action(self, text: str) -> Optional[Dict[str, Any]]:
+    def _parse_action(self, ctx: ParseCtx) -> Optional[Dict[str, Any]]:
         """解析操作指令"""
+        action_sets = self._keyword_sets["action"]
+        
         # 确认操作
-        confirm_words = ["确认", "完成", "好了", "可以", "确定", "ok", "yes"]
-        if any(word in text for word in confirm_words):
+        if not ctx.hits.isdisjoint(action_sets["confirm_words"]):
             return {
                 "action": "confirm",
                 "message": "配置已确认，开始生成报表"
             }
         
         # 取消操作
-        cancel_words = ["取消", "退出", "不要", "算了", "no", "cancel"]
-        if any(word in text for word in cancel_words):
+        if not ctx.hits.isdisjoint(action_sets["cancel_words"]):
             return {
                 "action": "cancel",
                 "message": "已取消配置"
             }
         
         # 重置操作
-        reset_words = ["重置", "重新", "reset", "重新开始"]
-        if any(word in text for word in reset_words):
+        if not ctx.hits.isdisjoint(action_sets["reset_words"]):
             return {
                 "action": "reset",
                 "message": "已重置配置"
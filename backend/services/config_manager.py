@@ -1,16 +1,94 @@
 """
 配置状态管理器 - 支持配置对话功能
 """
+import asyncio
+import heapq
 import time
 import json
+from collections import deque
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from types import MappingProxyType
+from typing import Dict, Any, Optional, List, Tuple
 from enum import Enum
 import logging
 
+try:
+    import orjson  # 可选依赖：存在时用于会话JSON序列化
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 logger = logging.getLogger(__name__)
 
+
+def _format_timestamp(ts: float) -> str:
+    """将内部使用的epoch秒转换为ISO格式字符串（仅在对外输出时转换）"""
+    return datetime.fromtimestamp(ts).isoformat()
+
+
+def _format_history(history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """复制历史记录并把其中的时间戳转换为ISO格式字符串"""
+    return [{**record, "timestamp": _format_timestamp(record["timestamp"])} for record in history]
+
+
+def _dump_session_json(out_path: Path, payload: Dict[str, Any]) -> None:
+    """将会话配置写入JSON文件（通过asyncio.to_thread在线程中执行，避免阻塞事件循环）"""
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if HAS_ORJSON:
+        # orjson直接输出UTF-8字节（不转义中文），缩进2格
+        out_path.write_bytes(orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
+    with out_path.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+
+
+# 各报表类型的默认配置（只读模板，get_default_config返回其拷贝）
+_DEFAULT_CONFIGS = MappingProxyType({
+    "steady_state": MappingProxyType({
+        "use_rpm_channel": False,
+        "rpm_channel_type": None,  # 必选，其值为 "Ng" 或 "Np"
+        "use_temperature_channel": False,
+        "use_pressure_channel": False,
+        "threshold": 10000,
+        "statistical_method": "平均值",
+        "time_window": 5,
+        "time_unit": "分钟"
+    }),
+    "function_calc": MappingProxyType({
+        "use_rpm_channel": False,
+        "rpm_channel_type": None,
+        "use_temperature_channel": True,
+        "use_pressure_channel": False,
+        "calculation_method": "多项式拟合",
+        "polynomial_degree": 2,
+        "time_window": 10,
+        "time_unit": "分钟"
+    }),
+    "status_eval": MappingProxyType({
+        "use_rpm_channel": False,
+        "rpm_channel_type": None,
+        "use_temperature_channel": True,
+        "use_pressure_channel": True,
+        "evaluation_criteria": "综合评估",
+        "threshold_rpm": 10000,
+        "threshold_temperature": 80,
+        "threshold_pressure": 100
+    }),
+    "complete": MappingProxyType({
+        "use_rpm_channel": False,
+        "rpm_channel_type": None,
+        "use_temperature_channel": True,
+        "use_pressure_channel": True,
+        "include_steady_state": True,
+        "include_function_calc": True,
+        "include_status_eval": True,
+        "time_window": 15,
+        "time_unit": "分钟"
+    }),
+})
+
+
 class ConfigStatus(str, Enum):
     """配置状态枚举"""
     CONFIGURING = "configuring"  # 配置中
@@ -21,9 +99,17 @@ class ConfigStatus(str, Enum):
 class ConfigManager:
     """配置状态管理器 - 支持配置对话功能"""
     
+    # 每个会话保留的历史记录条数上限
+    HISTORY_MAXLEN = 200
+    
     def __init__(self):
         self.active_sessions: Dict[str, Dict[str, Any]] = {}
         self.session_timeout = 3600  # 1小时超时
+        # 过期检查最小堆：(最后活动时间戳, session_id)；会话每次活动都会压入新条目，旧条目在出堆时按实际活动时间甄别
+        self._expiry_heap: List[Tuple[float, str]] = []
+        # 活跃会话（配置中/确认中）索引，值恒为None的dict用作有序集合，保持会话创建顺序
+        self._active_ids: Dict[str, None] = {}
+        self._by_user: Dict[str, Dict[str, None]] = {}
     
     async def start_config_session(self, report_type: str, user_id: str) -> Dict[str, Any]:
         """
@@ -36,7 +122,8 @@ class ConfigManager:
         Returns:
             会话信息字典
         """
-        session_id = f"{user_id}_{report_type}_{int(time.time())}"
+        now = time.time()
+        session_id = f"{user_id}_{report_type}_{int(now)}"
         
         # 获取默认配置
         default_config = self.get_default_config(report_type)
@@ -45,12 +132,15 @@ class ConfigManager:
             "report_type": report_type,
             "config": default_config,
             "status": ConfigStatus.CONFIGURING,
-            "created_at": datetime.now(),
+            "created_at": now,
             "user_id": user_id,
-            "last_activity": datetime.now(),
+            "last_activity": now,
             "step": 0,
-            "history": []  # 配置历史记录
+            "history": deque(maxlen=self.HISTORY_MAXLEN)  # 配置历史记录（仅保留最近的记录）
         }
+        self._schedule_expiry(session_id)
+        self._active_ids[session_id] = None
+        self._by_user.setdefault(user_id, {})[session_id] = None
         
         logger.info(f"开始配置会话: {session_id}, 报表类型: {report_type}")
         
@@ -85,27 +175,25 @@ class ConfigManager:
         
         session = self.active_sessions[session_id]
         
-        # 记录配置历史
-        old_config = session["config"].copy()
-        
-        # 应用更新
+        # 应用更新，只记录实际变更的字段（旧值 -> 新值），不复制整份配置
+        changes = []
         for field, value in updates.items():
             if field in session["config"]:
+                changes.append({"field": field, "old": session["config"][field], "new": value})
                 session["config"][field] = value
                 logger.info(f"更新配置: {field} = {value}")
         
         # 更新活动时间
-        session["last_activity"] = datetime.now()
+        now = time.time()
+        session["last_activity"] = now
+        self._schedule_expiry(session_id)
         session["step"] += 1
         
         # 记录历史
         session["history"].append({
-            "timestamp": datetime.now(),
+            "timestamp": now,
             "action": "update",
-            "field": list(updates.keys())[0] if updates else "unknown",
-            "value": list(updates.values())[0] if updates else None,
-            "old_config": old_config,
-            "new_config": session["config"].copy()
+            "changes": changes
         })
         
         return {
@@ -141,7 +229,8 @@ class ConfigManager:
                 }
             # 第一次点击完成配置，进入确认状态
             session["status"] = ConfigStatus.CONFIRMING
-            session["last_activity"] = datetime.now()
+            session["last_activity"] = time.time()
+            self._schedule_expiry(session_id)
             
             return {
                 "config": session["config"],
@@ -151,26 +240,26 @@ class ConfigManager:
         elif session["status"] == ConfigStatus.CONFIRMING:
             # 第二次点击完成配置，真正完成
             session["status"] = ConfigStatus.COMPLETED
-            session["last_activity"] = datetime.now()
+            session["last_activity"] = time.time()
+            self._schedule_expiry(session_id)
+            self._deactivate(session_id)
             
             # 记录完成历史
             session["history"].append({
-                "timestamp": datetime.now(),
+                "timestamp": session["last_activity"],
                 "action": "complete",
                 "config": session["config"].copy()
             })
             # 持久化到JSON（每个会话一份）
             try:
                 project_root = Path(__file__).resolve().parents[2]
-                out_dir = project_root / "samples" / "config_sessions"
-                out_dir.mkdir(parents=True, exist_ok=True)
-                out_path = out_dir / f"{session_id}.json"
-                with out_path.open("w", encoding="utf-8") as f:
-                    json.dump({
-                        "session_id": session_id,
-                        "report_type": session["report_type"],
-                        "config": session["config"]
-                    }, f, ensure_ascii=False, indent=2)
+                out_path = project_root / "samples" / "config_sessions" / f"{session_id}.json"
+                payload = {
+                    "session_id": session_id,
+                    "report_type": session["report_type"],
+                    "config": dict(session["config"])
+                }
+                await asyncio.to_thread(_dump_session_json, out_path, payload)
             except Exception as persist_err:
                 logger.warning(f"保存配置到JSON失败: {persist_err}")
             
@@ -203,11 +292,13 @@ class ConfigManager:
         
         session = self.active_sessions[session_id]
         session["status"] = ConfigStatus.CANCELLED
-        session["last_activity"] = datetime.now()
+        session["last_activity"] = time.time()
+        self._schedule_expiry(session_id)
+        self._deactivate(session_id)
         
         # 记录取消历史
         session["history"].append({
-            "timestamp": datetime.now(),
+            "timestamp": session["last_activity"],
             "action": "cancel",
             "config": session["config"].copy()
         })
@@ -233,16 +324,17 @@ class ConfigManager:
         # 清理过期会话
         self._cleanup_expired_sessions()
         
-        for session_id, session in self.active_sessions.items():
-            if session["status"] in [ConfigStatus.CONFIGURING, ConfigStatus.CONFIRMING]:
-                if user_id is None or session["user_id"] == user_id:
-                    return {
-                        "session_id": session_id,
-                        "report_type": session["report_type"],
-                        "config": session["config"],
-                        "status": session["status"],
-                        "user_id": session["user_id"]
-                    }
+        # 只查看活跃会话索引（指定用户时仅查看该用户的活跃会话）
+        candidates = self._active_ids if user_id is None else self._by_user.get(user_id, {})
+        for session_id in candidates:
+            session = self.active_sessions[session_id]
+            return {
+                "session_id": session_id,
+                "report_type": session["report_type"],
+                "config": session["config"],
+                "status": session["status"],
+                "user_id": session["user_id"]
+            }
         
         return None
     
@@ -268,64 +360,38 @@ class ConfigManager:
         Returns:
             默认配置字典
         """
-        default_configs = {
-            "steady_state": {
-                "use_rpm_channel": False,
-                "rpm_channel_type": None,  # 必选，其值为 "Ng" 或 "Np"
-                "use_temperature_channel": False,
-                "use_pressure_channel": False,
-                "threshold": 10000,
-                "statistical_method": "平均值",
-                "time_window": 5,
-                "time_unit": "分钟"
-            },
-            "function_calc": {
-                "use_rpm_channel": False,
-                "rpm_channel_type": None,
-                "use_temperature_channel": True,
-                "use_pressure_channel": False,
-                "calculation_method": "多项式拟合",
-                "polynomial_degree": 2,
-                "time_window": 10,
-                "time_unit": "分钟"
-            },
-            "status_eval": {
-                "use_rpm_channel": False,
-                "rpm_channel_type": None,
-                "use_temperature_channel": True,
-                "use_pressure_channel": True,
-                "evaluation_criteria": "综合评估",
-                "threshold_rpm": 10000,
-                "threshold_temperature": 80,
-                "threshold_pressure": 100
-            },
-            "complete": {
-                "use_rpm_channel": False,
-                "rpm_channel_type": None,
-                "use_temperature_channel": True,
-                "use_pressure_channel": True,
-                "include_steady_state": True,
-                "include_function_calc": True,
-                "include_status_eval": True,
-                "time_window": 15,
-                "time_unit": "分钟"
-            }
-        }
-        
-        return default_configs.get(report_type, {})
+        # 默认值均为标量，浅拷贝即可得到可独立修改的配置
+        return dict(_DEFAULT_CONFIGS.get(report_type, {}))
+    
+    def _deactivate(self, session_id: str):
+        """将会话移出活跃索引（完成、取消或过期时调用）"""
+        self._active_ids.pop(session_id, None)
+        session = self.active_sessions.get(session_id)
+        if session is None:
+            return
+        user_sessions = self._by_user.get(session["user_id"])
+        if user_sessions is not None:
+            user_sessions.pop(session_id, None)
+            if not user_sessions:
+                del self._by_user[session["user_id"]]
+    
+    def _schedule_expiry(self, session_id: str):
+        """按会话当前的最后活动时间登记过期检查"""
+        last_activity = self.active_sessions[session_id]["last_activity"]
+        heapq.heappush(self._expiry_heap, (last_activity, session_id))
     
     def _cleanup_expired_sessions(self):
-        """清理过期的会话"""
-        current_time = datetime.now()
-        expired_sessions = []
-        
-        for session_id, session in self.active_sessions.items():
-            time_diff = (current_time - session["last_activity"]).total_seconds()
-            if time_diff > self.session_timeout:
-                expired_sessions.append(session_id)
+        """清理过期的会话（只弹出堆顶已超时的条目，无需遍历全部会话）"""
+        cutoff = time.time() - self.session_timeout
         
-        for session_id in expired_sessions:
+        while self._expiry_heap and self._expiry_heap[0][0] < cutoff:
+            _, session_id = heapq.heappop(self._expiry_heap)
+            session = self.active_sessions.get(session_id)
+            # 会话已删除，或之后又有活动（堆中有更新的条目），跳过
+            if session is None or session["last_activity"] >= cutoff:
+                continue
             logger.info(f"清理过期会话: {session_id}")
+            self._deactivate(session_id)
             del self.active_sessions[session_id]
     
     def get_config_history(self, session_id: str) -> List[Dict[str, Any]]:
@@ -340,7 +406,7 @@ class ConfigManager:
         """
         session = self.active_sessions.get(session_id)
         if session:
-            return session.get("history", [])
+            return _format_history(session.get("history", []))
         return []
     
     def get_all_sessions(self) -> Dict[str, Dict[str, Any]]:
@@ -350,7 +416,15 @@ class ConfigManager:
         Returns:
             所有会话信息
         """
-        return self.active_sessions.copy()
+        return {
+            session_id: {
+                **session,
+                "created_at": _format_timestamp(session["created_at"]),
+                "last_activity": _format_timestamp(session["last_activity"]),
+                "history": _format_history(session.get("history", [])),
+            }
+            for session_id, session in self.active_sessions.items()
+        }
 
 # 全局配置管理器实例
 config_manager = ConfigManager()
@@ -1,6 +1,8 @@
 """
 数据读取服务 - 读取CSV/Excel文件并转换为时序数据流
 """
+import codecs
+import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
@@ -9,6 +11,12 @@ from dataclasses import dataclass
 from datetime import datetime
 import logging
 
+try:
+    import pyarrow  # noqa: F401  可选依赖：存在时使用Arrow引擎读取CSV
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
 logger = logging.getLogger(__name__)
 
 
@@ -29,14 +37,43 @@ class ChannelData:
 class DataReader:
     """数据读取器"""
     
+    # CSV候选编码（按优先级）
+    CSV_ENCODINGS = ['utf-8', 'gbk', 'gb2312', 'utf-8-sig']
+    # 编码探测读取的文件头部字节数
+    ENCODING_SNIFF_BYTES = 65536
+    
     def __init__(self):
         self.time_columns = ['time', 'time[s]', 'Time', 'Time[s]', 'timestamp', 'Timestamp', 't', 'T', 'TIME', 'TIME[s]']
+        # 小写时间列名集合，供find_time_column做O(1)匹配
+        self._time_columns_lc = frozenset(tc.lower().strip() for tc in self.time_columns)
     
     def read_csv(self, file_path: str) -> pd.DataFrame:
         """读取CSV文件"""
         try:
+            # 先用文件头部字节探测编码，通常只需完整解析一次
+            encoding = self._sniff_encoding(file_path)
+            # Arrow引擎（多线程解析）只支持UTF-8，其他编码直接走默认引擎，避免重复解析
+            if HAS_PYARROW and encoding in ('utf-8', 'utf-8-sig'):
+                try:
+                    df = pd.read_csv(file_path, engine="pyarrow")
+                    # Arrow会把时间样式的列推断为日期时间类型，默认引擎保留为字符串；
+                    # 出现这类列时改用默认引擎，保证两种引擎读出的类型一致
+                    if not any(pd.api.types.is_datetime64_any_dtype(dtype) for dtype in df.dtypes):
+                        logger.info("成功使用 pyarrow 引擎读取文件")
+                        return df
+                    logger.debug("pyarrow 引擎推断出日期时间列，改用默认引擎读取")
+                except Exception as e:
+                    logger.debug(f"pyarrow 引擎读取失败，回退到默认引擎: {e}")
+            if encoding:
+                try:
+                    df = pd.read_csv(file_path, encoding=encoding)
+                    logger.info(f"成功使用 {encoding} 编码读取文件")
+                    return df
+                except UnicodeDecodeError:
+                    logger.debug(f"探测编码 {encoding} 读取失败，逐个尝试候选编码")
+            
             # 尝试多种编码
-            for encoding in ['utf-8', 'gbk', 'gb2312', 'utf-8-sig']:
+            for encoding in self.CSV_ENCODINGS:
                 try:
                     df = pd.read_csv(file_path, encoding=encoding)
                     logger.info(f"成功使用 {encoding} 编码读取文件")
@@ -52,6 +89,19 @@ class DataReader:
             logger.error(f"读取CSV文件失败: {str(e)}")
             raise
     
+    def _sniff_encoding(self, file_path: str) -> Optional[str]:
+        """读取文件头部字节，返回第一个能解码的候选编码（文件后部仍可能解码失败，由调用方兜底）"""
+        with open(file_path, 'rb') as f:
+            head = f.read(self.ENCODING_SNIFF_BYTES)
+        for encoding in self.CSV_ENCODINGS:
+            try:
+                # 增量解码器容忍头部末尾被截断的多字节字符
+                codecs.getincrementaldecoder(encoding)().decode(head, final=False)
+                return encoding
+            except UnicodeDecodeError:
+                continue
+        return None
+    
     def read_excel(self, file_path: str) -> pd.DataFrame:
         """读取Excel文件"""
         try:
@@ -80,8 +130,7 @@ class DataReader:
     def find_time_column(self, df: pd.DataFrame) -> Optional[str]:
         """查找时间列"""
         for col in df.columns:
-            col_lower = col.lower().strip()
-            if col_lower in [tc.lower() for tc in self.time_columns]:
+            if col.lower().strip() in self._time_columns_lc:
                 return col
         
         # 如果没找到标准名称，尝试识别第一列是否为时间
@@ -89,8 +138,8 @@ class DataReader:
             first_col = df.columns[0]
             # 检查第一列是否为数值类型的递增序列
             try:
-                data = pd.to_numeric(df[first_col], errors='coerce').dropna()
-                if len(data) > 10 and all(data.iloc[i] <= data.iloc[i+1] for i in range(len(data)-1)):
+                data = pd.to_numeric(df[first_col], errors='coerce').dropna().to_numpy()
+                if data.size > 10 and self._is_non_decreasing(data):
                     logger.info(f"推断时间列: {first_col}")
                     return first_col
             except:
@@ -98,6 +147,14 @@ class DataReader:
         
         return None
     
+    @staticmethod
+    def _is_non_decreasing(data: np.ndarray, sample_size: int = 1000) -> bool:
+        """判断序列是否单调不减（先检查首尾样本，不满足时无需全量比较）"""
+        if data.size > 2 * sample_size:
+            if np.any(np.diff(data[:sample_size]) < 0) or np.any(np.diff(data[-sample_size:]) < 0):
+                return False
+        return bool(np.all(np.diff(data) >= 0))
+    
     def get_channel_columns(self, df: pd.DataFrame) -> List[str]:
         """获取通道列（排除时间列）"""
         time_col = self.find_time_column(df)
@@ -109,12 +166,23 @@ class DataReader:
         
         return channel_columns
     
-    def read_data_stream(self, file_path: str, channel_names: List[str]) -> List[Tuple[float, Dict[str, float]]]:
+    def read_data_frame(
+        self,
+        file_path: str,
+        channel_names: List[str],
+        dtype: np.dtype = np.float64
+    ) -> Tuple[np.ndarray, np.ndarray, List[str]]:
         """
-        读取数据流，返回时序数据
+        读取数据，返回列式（SoA）数组
+        
+        Args:
+            file_path: 数据文件路径
+            channel_names: 需要读取的通道列表
+            dtype: 通道数据类型，默认float64；传np.float32可减半内存，但会损失精度；时间戳始终为float64
         
         Returns:
-            List of (timestamp, {channel_name: value}) tuples
+            (timestamps, values, channels)：timestamps形状为(N,)；values形状为(N, C)，
+            列顺序与channels一致；channels即请求的通道列表，不存在的通道以0.0填充
         """
         df = self.read_file(file_path)
         
@@ -124,21 +192,41 @@ class DataReader:
             raise ValueError("未找到时间列")
         
         # 将时间列转换为数值
-        time_data = pd.to_numeric(df[time_col], errors='coerce').fillna(0)
-        
-        data_stream = []
-        for idx, timestamp in enumerate(time_data):
-            values = {}
-            for channel in channel_names:
-                if channel in df.columns:
-                    value = pd.to_numeric(df[channel].iloc[idx], errors='coerce')
-                    values[channel] = value if not pd.isna(value) else 0.0
-                else:
-                    logger.warning(f"通道 {channel} 不存在于数据中")
-                    values[channel] = 0.0
-            
-            data_stream.append((float(timestamp), values))
+        timestamps = pd.to_numeric(df[time_col], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+        
+        # 按列整体转换通道数据，缺失通道补零列
+        channels = list(channel_names)
+        missing_channels = [channel for channel in channels if channel not in df.columns]
+        if missing_channels:
+            logger.warning(f"通道 {missing_channels} 不存在于数据中，按0.0填充")
+        columns = []
+        for channel in channels:
+            if channel in df.columns:
+                columns.append(pd.to_numeric(df[channel], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64))
+            else:
+                columns.append(np.zeros(len(df), dtype=np.float64))
+        values = np.column_stack(columns) if columns else np.empty((len(df), 0), dtype=np.float64)
+        values = values.astype(dtype, copy=False)
+        
+        return timestamps, values, channels
+    
+    def read_data_stream(self, file_path: str, channel_names: List[str]) -> List[Tuple[float, Dict[str, float]]]:
+        """
+        读取数据流，返回时序数据（read_data_frame的逐点字典形式，供按点处理的计算器使用）
+        
+        数值保持float64：计算器会将原始值直接写入报表并与阈值比较
+        
+        Returns:
+            List of (timestamp, {channel_name: value}) tuples
+        """
+        timestamps, values, channels = self.read_data_frame(file_path, channel_names)
+        # 驻留通道名：所有数据点字典共享同一组键对象，下游按通道名查找时可直接按指针比较
+        channels = [sys.intern(c) if isinstance(c, str) else c for c in channels]
+        
+        data_stream = [
+            (timestamp, dict(zip(channels, row)))
+            for timestamp, row in zip(timestamps.tolist(), values.tolist())
+        ]
         
         logger.info(f"成功读取 {len(data_stream)} 个数据点")
         return data_stream
-
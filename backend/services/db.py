@@ -1,16 +1,74 @@
 # backend/services/db.py
+import errno
 import hashlib
 import json
+import logging
 import os
 import tempfile
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, Iterator, List, Optional, Tuple
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
 
 from sqlalchemy import create_engine, text
 
+try:
+    import orjson  # optional: faster JSON encoding for save_json_config
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = os.getenv("DATABASE_URL")
-_engine = create_engine(DATABASE_URL, pool_pre_ping=True) if DATABASE_URL else None
+_engine = (
+    create_engine(
+        DATABASE_URL,
+        pool_pre_ping=True,
+        # LIFO keeps the few hot connections warm instead of cycling through the whole pool.
+        pool_use_lifo=True,
+        pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    )
+    if DATABASE_URL
+    else None
+)
+# Single-statement reads need no transaction: autocommit skips the BEGIN/COMMIT round trips.
+_read_engine = _engine.execution_options(isolation_level="AUTOCOMMIT") if _engine else None
+
+_HASH_CHUNK_SIZE = 1 << 20
+
+# Opt-in: keep upload payloads in an UNLOGGED side table so multi-MB BYTEA writes skip the WAL.
+# Unlogged tables are truncated after a crash; get_uploaded_file then reports the file as missing
+# while its metadata row survives. Keep the flag stable once data has been written with it.
+UNLOGGED_BLOBS = os.getenv("DB_UNLOGGED_BLOBS", "").lower() in ("1", "true", "yes")
+
+# Materialised uploads are short-lived: put them on tmpfs when available so they never hit disk.
+# (A memfd /proc/self/fd path is not used because readers dispatch on the file suffix.)
+# tmpfs is often small (Docker defaults /dev/shm to 64 MB), so it is only used when the file fits
+# in its free space, and a write that still runs out of space is retried in the default tempdir.
+_MATERIALIZE_DIR = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+
+
+def sha256_hex(content: Union[bytes, BinaryIO]) -> str:
+    """
+    Hex SHA-256 of in-memory bytes or a binary file object.
+
+    hashlib delegates to the OpenSSL that CPython links against; OpenSSL >= 1.1.1 picks the
+    SHA-NI code path on CPUs that support it. File objects go through hashlib.file_digest
+    (Python 3.11+), which reads into a reusable buffer instead of materialising the file.
+    """
+    if not isinstance(content, (bytes, bytearray, memoryview)):
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(content, "sha256").hexdigest()
+        h = hashlib.sha256()
+        for chunk in iter(lambda: content.read(_HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+        return h.hexdigest()
+    h = hashlib.sha256()
+    view = memoryview(content)
+    for offset in range(0, len(view), _HASH_CHUNK_SIZE):
+        h.update(view[offset:offset + _HASH_CHUNK_SIZE])
+    return h.hexdigest()
 
 
 def init_schema() -> None:
@@ -52,15 +110,94 @@ def init_schema() -> None:
     CREATE INDEX IF NOT EXISTS idx_json_configs_file_id ON json_configs (file_id, name);
     CREATE INDEX IF NOT EXISTS idx_generated_reports_file_id ON generated_reports (file_id);
     """
+    blob_ddl = """
+    CREATE UNLOGGED TABLE IF NOT EXISTS uploaded_file_blobs (
+      file_id TEXT PRIMARY KEY REFERENCES uploaded_files (file_id) ON DELETE CASCADE,
+      content BYTEA NOT NULL
+    );
+    ALTER TABLE uploaded_files ALTER COLUMN content DROP NOT NULL;
+    """
+    relations = [
+        "uploaded_files", "json_configs", "generated_reports",
+        "idx_uploaded_files_file_id", "idx_json_configs_file_id", "idx_generated_reports_file_id",
+    ]
+    ddl = table_ddl + index_ddl
+    if UNLOGGED_BLOBS:
+        relations.append("uploaded_file_blobs")
+        ddl += blob_ddl
     with _engine.begin() as conn:
-        for stmt in table_ddl.strip().split(";"):
-            s = stmt.strip()
-            if s:
-                conn.execute(text(s))
-        for stmt in index_ddl.strip().split(";"):
-            s = stmt.strip()
-            if s:
-                conn.execute(text(s))
+        # Common case on restart: everything exists, so one catalog lookup replaces the DDL.
+        present = conn.execute(
+            text("SELECT bool_and(to_regclass(name) IS NOT NULL) FROM unnest(CAST(:names AS text[])) AS name"),
+            dict(names=relations),
+        ).scalar()
+        if present:
+            return
+        # psycopg2 sends the whole multi-statement script in one simple-query round trip.
+        conn.exec_driver_sql(ddl)
+
+
+# Statements are built once at import; SQLAlchemy then reuses their compiled form per call.
+_UPSERT_UPLOADED_FILE = text(
+    """
+    INSERT INTO uploaded_files (file_id, file_name, content_type, category, size_bytes, sha256, content)
+    VALUES (:file_id, :file_name, :content_type, :category, :size_bytes, :sha256, :content)
+    ON CONFLICT (file_id) DO UPDATE
+    SET file_name = EXCLUDED.file_name,
+        content_type = EXCLUDED.content_type,
+        category = EXCLUDED.category,
+        size_bytes = EXCLUDED.size_bytes,
+        sha256 = EXCLUDED.sha256,
+        content = EXCLUDED.content,
+        created_at = now()
+    """
+)
+_UPSERT_UPLOADED_BLOB = text(
+    """
+    INSERT INTO uploaded_file_blobs (file_id, content) VALUES (:file_id, :content)
+    ON CONFLICT (file_id) DO UPDATE SET content = EXCLUDED.content
+    """
+)
+# Row lock so a concurrent upload of the same file_id cannot slip in between check and write.
+# The second column guards against a lost UNLOGGED blob (truncated after a crash).
+_SELECT_STORED_SHA256 = text(
+    "SELECT sha256, content IS NOT NULL FROM uploaded_files WHERE file_id = :file_id FOR UPDATE"
+)
+_SELECT_STORED_SHA256_UNLOGGED = text(
+    "SELECT f.sha256, EXISTS (SELECT 1 FROM uploaded_file_blobs b WHERE b.file_id = f.file_id) "
+    "FROM uploaded_files f WHERE f.file_id = :file_id FOR UPDATE"
+)
+_TOUCH_UPLOADED_FILE = text(
+    """
+    UPDATE uploaded_files
+    SET file_name = :file_name, content_type = :content_type, category = :category, created_at = now()
+    WHERE file_id = :file_id
+    """
+)
+_INSERT_JSON_CONFIG = text(
+    """
+    INSERT INTO json_configs (file_id, name, content)
+    VALUES (:file_id, :name, CAST(:content AS jsonb))
+    """
+)
+_INSERT_REPORT = text(
+    """
+    INSERT INTO generated_reports (file_id, report_name, content_type, size_bytes, sha256, content)
+    VALUES (:file_id, :report_name, :content_type, :size_bytes, :sha256, :content)
+    RETURNING id
+    """
+)
+_SELECT_REPORT_BY_ID = text("SELECT report_name, content_type, content FROM generated_reports WHERE id = :id")
+_SELECT_REPORT_BY_NAME = text(
+    "SELECT report_name, content_type, content "
+    "FROM generated_reports WHERE report_name = :report_name"
+)
+_LIST_SENTINEL = text("SELECT count(*), max(created_at) FROM uploaded_files")
+_LIST_UPLOADED = text(
+    "SELECT file_id, file_name, content_type, category, size_bytes, sha256, created_at "
+    "FROM uploaded_files ORDER BY created_at DESC"
+)
+_DELETE_UPLOADED = text("DELETE FROM uploaded_files WHERE file_id = :file_id")
 
 
 def save_raw_file(
@@ -69,36 +206,47 @@ def save_raw_file(
     content: bytes,
     category: str,
     content_type: Optional[str],
+    sha256: Optional[str] = None,
 ) -> None:
+    """Upsert an uploaded file; pass sha256 when the caller already hashed the content."""
     if not _engine:
         return
-    sha256 = hashlib.sha256(content).hexdigest()
+    if sha256 is None:
+        sha256 = sha256_hex(content)
     with _engine.begin() as conn:
-        conn.execute(
-            text(
-                """
-                INSERT INTO uploaded_files (file_id, file_name, content_type, category, size_bytes, sha256, content)
-                VALUES (:file_id, :file_name, :content_type, :category, :size_bytes, :sha256, :content)
-                ON CONFLICT (file_id) DO UPDATE
-                SET file_name = EXCLUDED.file_name,
-                    content_type = EXCLUDED.content_type,
-                    category = EXCLUDED.category,
-                    size_bytes = EXCLUDED.size_bytes,
-                    sha256 = EXCLUDED.sha256,
-                    content = EXCLUDED.content,
-                    created_at = now()
-                """
-            ),
-            dict(
-                file_id=file_id,
-                file_name=file_name,
-                content_type=content_type,
-                category=category,
-                size_bytes=len(content),
-                sha256=sha256,
-                content=content,
-            ),
-        )
+        existing = conn.execute(
+            _SELECT_STORED_SHA256_UNLOGGED if UNLOGGED_BLOBS else _SELECT_STORED_SHA256,
+            dict(file_id=file_id),
+        ).first()
+        if existing is not None and existing[0] == sha256 and existing[1]:
+            # Idempotent re-upload: refresh metadata only, leaving the stored bytes (and WAL) untouched.
+            conn.execute(
+                _TOUCH_UPLOADED_FILE,
+                dict(file_id=file_id, file_name=file_name, content_type=content_type, category=category),
+            )
+        else:
+            conn.execute(
+                _UPSERT_UPLOADED_FILE,
+                dict(
+                    file_id=file_id,
+                    file_name=file_name,
+                    content_type=content_type,
+                    category=category,
+                    size_bytes=len(content),
+                    sha256=sha256,
+                    content=None if UNLOGGED_BLOBS else content,
+                ),
+            )
+            if UNLOGGED_BLOBS:
+                conn.execute(_UPSERT_UPLOADED_BLOB, dict(file_id=file_id, content=content))
+    _invalidate_list_cache()
+
+
+def _dump_json(content_obj: dict) -> str:
+    if HAS_ORJSON:
+        # orjson emits compact UTF-8 like json.dumps(ensure_ascii=False); jsonb normalises spacing anyway.
+        return orjson.dumps(content_obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(content_obj, ensure_ascii=False)
 
 
 def save_json_config(file_id: str, name: str, content_obj: dict) -> None:
@@ -106,29 +254,21 @@ def save_json_config(file_id: str, name: str, content_obj: dict) -> None:
         return
     with _engine.begin() as conn:
         conn.execute(
-            text(
-                """
-                INSERT INTO json_configs (file_id, name, content)
-                VALUES (:file_id, :name, CAST(:content AS jsonb))
-                """
-            ),
-            dict(file_id=file_id, name=name, content=json.dumps(content_obj, ensure_ascii=False)),
+            _INSERT_JSON_CONFIG,
+            dict(file_id=file_id, name=name, content=_dump_json(content_obj)),
         )
 
 
-def save_report_file(file_id: str, report_name: str, content: bytes) -> Optional[int]:
+def save_report_file(
+    file_id: str, report_name: str, content: bytes, sha256: Optional[str] = None
+) -> Optional[int]:
     if not _engine:
         return None
-    sha256 = hashlib.sha256(content).hexdigest()
+    if sha256 is None:
+        sha256 = sha256_hex(content)
     with _engine.begin() as conn:
         row = conn.execute(
-            text(
-                """
-                INSERT INTO generated_reports (file_id, report_name, content_type, size_bytes, sha256, content)
-                VALUES (:file_id, :report_name, :content_type, :size_bytes, :sha256, :content)
-                RETURNING id
-                """
-            ),
+            _INSERT_REPORT,
             dict(
                 file_id=file_id,
                 report_name=report_name,
@@ -144,43 +284,149 @@ def save_report_file(file_id: str, report_name: str, content: bytes) -> Optional
 def get_report_file(report_id: int) -> Optional[Tuple[str, str, bytes]]:
     if not _engine:
         return None
-    with _engine.begin() as conn:
-        row = conn.execute(
-            text("SELECT report_name, content_type, content FROM generated_reports WHERE id = :id"),
-            dict(id=report_id),
-        ).first()
+    with _read_engine.connect() as conn:
+        row = conn.execute(_SELECT_REPORT_BY_ID, dict(id=report_id)).first()
         return row if row else None
 
 
 def get_report_file_by_name(report_name: str) -> Optional[Tuple[str, str, bytes]]:
     if not _engine:
         return None
-    with _engine.begin() as conn:
-        row = conn.execute(
-            text(
-                "SELECT report_name, content_type, content "
-                "FROM generated_reports WHERE report_name = :report_name"
-            ),
-            dict(report_name=report_name),
-        ).first()
+    with _read_engine.connect() as conn:
+        row = conn.execute(_SELECT_REPORT_BY_NAME, dict(report_name=report_name)).first()
         return row if row else None
 
 
+def _upload_content_source() -> Tuple[str, str]:
+    """(FROM clause, content expression) for reading upload payloads, aliasing uploaded_files as f."""
+    if UNLOGGED_BLOBS:
+        return (
+            "uploaded_files f LEFT JOIN uploaded_file_blobs b ON b.file_id = f.file_id",
+            "COALESCE(f.content, b.content)",
+        )
+    return "uploaded_files f", "f.content"
+
+
 def get_uploaded_file(file_id: str) -> Optional[Tuple[str, Optional[str], str, bytes]]:
     """
     Returns (file_name, content_type, category, content) for the given file_id.
     """
     if not _engine:
         return None
-    with _engine.begin() as conn:
-        row = conn.execute(
-            text(
-                "SELECT file_name, content_type, category, content "
-                "FROM uploaded_files WHERE file_id = :file_id"
-            ),
+    source, content = _upload_content_source()
+    query = (
+        f"SELECT f.file_name, f.content_type, f.category, {content} AS content "
+        f"FROM {source} WHERE f.file_id = :file_id"
+    )
+    with _read_engine.connect() as conn:
+        row = conn.execute(text(query), dict(file_id=file_id)).first()
+    if row and row.content is None:
+        # Unlogged blob lost in a crash: the metadata row alone is not a usable file.
+        logger.warning(f"Uploaded file {file_id} has no stored content")
+        return None
+    return row if row else None
+
+
+def _write_all(fp: BinaryIO, data: Any) -> None:
+    """Write a bytes-like object without copying it; unbuffered files may accept it in parts."""
+    view = memoryview(data)
+    while view:
+        view = view[fp.write(view):]
+
+
+def stream_uploaded_file_to(
+    file_id: str, fp: BinaryIO, chunk_size: int = 8 << 20
+) -> Optional[Dict[str, Any]]:
+    """
+    Copy an uploaded file's content into fp in chunk_size slices and return its metadata.
+
+    Each slice is fetched with substring() inside one REPEATABLE READ transaction, so peak memory
+    is one chunk rather than the whole BYTEA and a concurrent re-upload cannot tear the copy.
+    Returns None when the file does not exist.
+    """
+    if not _engine:
+        return None
+    source, content = _upload_content_source()
+    with _engine.connect().execution_options(isolation_level="REPEATABLE READ") as conn:
+        with conn.begin():
+            row = conn.execute(
+                text(
+                    f"SELECT f.file_name, f.content_type, f.category, octet_length({content}) AS size_bytes "
+                    f"FROM {source} WHERE f.file_id = :file_id"
+                ),
+                dict(file_id=file_id),
+            ).first()
+            if not row:
+                return None
+            if row.size_bytes is None:
+                logger.warning(f"Uploaded file {file_id} has no stored content")
+                return None
+            chunk_query = text(
+                f"SELECT substring({content} FROM :start FOR :length) FROM {source} WHERE f.file_id = :file_id"
+            )
+            for offset in range(0, row.size_bytes, chunk_size):
+                chunk = conn.execute(
+                    chunk_query, dict(file_id=file_id, start=offset + 1, length=chunk_size)
+                ).scalar()
+                _write_all(fp, chunk)
+    return {
+        "file_name": row.file_name,
+        "content_type": row.content_type,
+        "category": row.category,
+        "size_bytes": row.size_bytes,
+    }
+
+
+def _uploaded_file_size(file_id: str) -> Optional[int]:
+    """Stored content size in bytes, or None when the file (or its content) is missing."""
+    if not _engine:
+        return None
+    source, content = _upload_content_source()
+    with _read_engine.connect() as conn:
+        return conn.execute(
+            text(f"SELECT octet_length({content}) FROM {source} WHERE f.file_id = :file_id"),
             dict(file_id=file_id),
-        ).first()
-        return row if row else None
+        ).scalar()
+
+
+def _materialize_dir(size_bytes: Optional[int]) -> Optional[str]:
+    """tmpfs directory when a file of size_bytes fits in its free space, else None (default tempdir)."""
+    if _MATERIALIZE_DIR is None or size_bytes is None:
+        return None
+    try:
+        stats = os.statvfs(_MATERIALIZE_DIR)
+    except OSError:
+        return None
+    return _MATERIALIZE_DIR if stats.f_bavail * stats.f_frsize > size_bytes else None
+
+
+def _remove_materialized(temp_dir: Path, temp_path: Path) -> None:
+    try:
+        temp_path.unlink(missing_ok=True)
+    except OSError:
+        pass
+    try:
+        temp_dir.rmdir()
+    except OSError:
+        pass
+
+
+def _materialize_into(file_id: str, directory: Optional[str]) -> Tuple[Path, Path, Dict[str, Any]]:
+    """Write the upload into a fresh temporary directory under directory; returns (dir, path, metadata)."""
+    temp_dir = Path(tempfile.mkdtemp(prefix="driadb_", dir=directory))
+    temp_path = temp_dir / f"{file_id}.part"
+    try:
+        with open(temp_path, "wb", buffering=0) as fp:
+            metadata = stream_uploaded_file_to(file_id, fp)
+        if metadata is None:
+            raise FileNotFoundError(f"No uploaded file found for id {file_id}")
+        # The suffix is only known once the metadata row has been read.
+        suffix = Path(metadata["file_name"]).suffix or ".tmp"
+        temp_path = temp_path.rename(temp_dir / f"{file_id}{suffix}")
+        return temp_dir, temp_path, metadata
+    except BaseException:
+        _remove_materialized(temp_dir, temp_path)
+        raise
 
 
 @contextmanager
@@ -188,47 +434,45 @@ def materialize_uploaded_file(file_id: str) -> Iterator[Tuple[Path, Dict[str, An
     """
     Context manager that writes the uploaded file content to a temporary file and yields its path
     along with basic metadata. The temporary file will be removed automatically.
+    The content is streamed from the database in chunks rather than loaded whole. The file is opened
+    unbuffered, so each chunk goes from the driver's buffer to write(2) without an intermediate copy.
     """
-    record = get_uploaded_file(file_id)
-    if not record:
-        raise FileNotFoundError(f"No uploaded file found for id {file_id}")
-
-    file_name, content_type, category, content = record
-    suffix = Path(file_name).suffix or ".tmp"
-    temp_dir = Path(tempfile.mkdtemp(prefix="driadb_"))
-    temp_path = temp_dir / f"{file_id}{suffix}"
-    temp_path.write_bytes(content)
-    metadata = {
-        "file_name": file_name,
-        "content_type": content_type,
-        "category": category,
-        "size_bytes": len(content),
-    }
-
+    directory = _materialize_dir(_uploaded_file_size(file_id))
+    try:
+        temp_dir, temp_path, metadata = _materialize_into(file_id, directory)
+    except OSError as exc:
+        if directory is None or exc.errno != errno.ENOSPC:
+            raise
+        # Concurrent materialisations share the tmpfs; fall back to disk rather than fail the request.
+        logger.warning(f"{directory} is full, materialising uploaded file {file_id} in {tempfile.gettempdir()}")
+        temp_dir, temp_path, metadata = _materialize_into(file_id, None)
     try:
         yield temp_path, metadata
     finally:
-        try:
-            temp_path.unlink(missing_ok=True)
-        except OSError:
-            pass
-        try:
-            temp_dir.rmdir()
-        except OSError:
-            pass
+        _remove_materialized(temp_dir, temp_path)
+
+
+# (count, max(created_at)) of uploaded_files -> listing built for that state.
+# Writers in this process drop it eagerly; the sentinel catches writes from other processes.
+_list_cache: Optional[Tuple[Tuple[Any, Any], List[Dict[str, Any]]]] = None
+
+
+def _invalidate_list_cache() -> None:
+    global _list_cache
+    _list_cache = None
 
 
 def list_uploaded_files() -> List[Dict[str, Any]]:
+    global _list_cache
     if not _engine:
         return []
-    with _engine.begin() as conn:
-        rows = conn.execute(
-            text(
-                "SELECT file_id, file_name, content_type, category, size_bytes, sha256, created_at "
-                "FROM uploaded_files ORDER BY created_at DESC"
-            )
-        ).fetchall()
-        return [
+    with _read_engine.connect() as conn:
+        sentinel = tuple(conn.execute(_LIST_SENTINEL).one())
+        cached = _list_cache
+        if cached is not None and cached[0] == sentinel:
+            return [dict(item) for item in cached[1]]
+        rows = conn.execute(_LIST_UPLOADED).fetchall()
+        files = [
             dict(
                 file_id=row.file_id,
                 file_name=row.file_name,
@@ -240,14 +484,14 @@ def list_uploaded_files() -> List[Dict[str, Any]]:
             )
             for row in rows
         ]
+    _list_cache = (sentinel, files)
+    return [dict(item) for item in files]
 
 
 def delete_uploaded_file(file_id: str) -> bool:
     if not _engine:
         return False
     with _engine.begin() as conn:
-        result = conn.execute(
-            text("DELETE FROM uploaded_files WHERE file_id = :file_id"),
-            dict(file_id=file_id),
-        )
+        result = conn.execute(_DELETE_UPLOADED, dict(file_id=file_id))
+    _invalidate_list_cache()
     return result.rowcount > 0
\ No newline at end of file
@@ -7,13 +7,24 @@ V3.1 - 最终修复。
        - 现在通过检测 T_Baseline 通道的“峰值已过”（开始下降）
          来切换状态，确保能正确捕获 T1。
 """
+import math
+import operator
 import numpy as np
 from collections import deque
+from itertools import chain
 from typing import List, Dict, Tuple, Any, Optional
 from dataclasses import dataclass
 import logging
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.utils import get_column_letter
+
+try:
+    from numba import njit  # 可选依赖：存在时将滑动极值内核编译为本地代码
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
 
 # 日志记录器将由调用方（你的测试文件）配置
 logger = logging.getLogger(__name__)
@@ -28,19 +39,132 @@ class FunctionalCalcConfig:
     rundown_ng: Optional[Dict[str, Any]]
     rundown_np: Optional[Dict[str, Any]]
 
+
+# 状态机状态（整数比较，日志中经 STATE_NAMES 显示名称）
+# 循环在 RAMPING_DOWN 中找齐 T2 的当点直接出行并回到 IDLE，没有单独的出行状态
+IDLE, RAMPING_UP, RAMPING_DOWN = 0, 1, 2
+STATE_NAMES = ("IDLE", "RAMPING_UP", "RAMPING_DOWN")
+
+# 逐点路径中各触发条件在结果掩码中的位
+TRIGGER_STARTUP, TRIGGER_BASELINE, TRIGGER_IGNITION = 1, 2, 4
+TRIGGER_NG_T1, TRIGGER_NG_T2, TRIGGER_NP_T1, TRIGGER_NP_T2 = 8, 16, 32, 64
+
+# 统计方法别名 -> 统计编号（小写匹配）
+_STAT_MEAN, _STAT_MAX, _STAT_MIN, _STAT_RMS = 0, 1, 2, 3
+_STAT_ALIASES = {
+    'average': _STAT_MEAN, '平均值': _STAT_MEAN, 'mean': _STAT_MEAN, 'avg': _STAT_MEAN,
+    'max': _STAT_MAX, '最大值': _STAT_MAX, 'maximum': _STAT_MAX,
+    'min': _STAT_MIN, '最小值': _STAT_MIN, 'minimum': _STAT_MIN,
+    'rms': _STAT_RMS, '有效值': _STAT_RMS, 'rootmeansquare': _STAT_RMS,
+    # 瞬时值窗口（差值计算）只取最早的值、不计算统计值；登记为已知类型以免构造时误报，
+    # 万一被计算时与以往一样按平均值处理
+    'instant': _STAT_MEAN, '瞬时值': _STAT_MEAN, 'instantaneous': _STAT_MEAN,
+}
+
+# 结果行中的时间差：(结果列, 被减事件, 减事件)；任一事件缺失时该列为 None
+_ROW_DIFFERENCES = (
+    ('startup_time', 'T_Baseline', 'T_Start'),
+    ('ignition_time', 'T_Ignition', 'T_Baseline'),
+    ('ng_rundown', 'T_Ng_T2', 'T_Ng_T1'),
+    ('np_rundown', 'T_Np_T2', 'T_Np_T1'),
+)
+
+
+# 滑动窗口环形缓冲区的初始容量（2 的幂，写满时翻倍）
+_RING_INITIAL_CAPACITY = 64
+
+
 class SlidingWindow:
-    """滑动窗口计算器"""
+    """滑动窗口计算器
+
+    窗口数据存放在预分配的 float64 环形缓冲区（时间/取整时间/数值三列，SoA），
+    按单调递增的序号寻址，不再为每个点分配 (timestamp, value) 元组。
+    窗口内维护运行和/平方和，最大/最小值统计额外维护单调队列，
+    calculate_statistic 为 O(1)。
+
+    已知采样率时可传入 sample_rate，缓冲区按窗口点数预分配，逐点更新中不再扩容。
+    过期仍按时间判断（采样不均匀时点数不固定），预分配只决定初始容量。
+    """
     
-    def __init__(self, duration: float, statistic_type: str = "平均值"):
+    def __init__(self, duration: float, statistic_type: str = "平均值", dtype=np.float64,
+                 sample_rate: Optional[float] = None):
         self.duration = duration
         self.statistic_type = statistic_type
-        self.window = deque()  # [(timestamp, value), ...]
         
         # (!!!) V3.2 修复：
         # 我们假设时间步长是0.01s，所以我们用 2 位小数的精度
         # （在真实代码中，这个精度可能需要动态计算，但对我们的测试数据 2 就够了）
         self._precision = 2 
 
+        # 环形缓冲区：序号 seq 存放在槽位 seq & _mask，窗口为 [_head, _tail)
+        capacity = _RING_INITIAL_CAPACITY
+        if sample_rate and sample_rate > 0 and duration and duration > 0:
+            # 窗口最多容纳 duration * sample_rate + 1 个点，留 2 个点余量后取 2 的幂
+            expected = math.ceil(duration * sample_rate) + 2
+            while capacity < expected:
+                capacity *= 2
+        self._mask = capacity - 1
+        self._times = np.empty(capacity)
+        self._rounded = np.empty(capacity)  # 入窗时取整一次，出队比较不再重复 round
+        self._values = np.empty(capacity, dtype=dtype)  # 时间列始终为 float64
+        self._narrow = self._values.dtype != np.float64
+        self._head = 0
+        self._tail = 0
+
+        # 增量统计状态
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._nonfinite = 0  # 窗口内 NaN/inf 的个数，这些值不进入累加器
+
+        # 统计方法在构造时解析一次，避免每次计算都做字符串比较
+        stat_lower = statistic_type.lower() if statistic_type else 'average'
+        self._stat_id = _STAT_ALIASES.get(stat_lower)
+        if self._stat_id is None:
+            # 未知类型只在构造时告警一次，计算时按平均值处理
+            logger.warning(f"未知的统计类型: {statistic_type}，使用平均值代替")
+            self._stat_id = _STAT_MEAN
+
+        # 单调队列 [(seq, value), ...]：最大值统计时值单调递减，最小值统计时单调递增，队首即窗口极值
+        self._track_extreme = self._stat_id in (_STAT_MAX, _STAT_MIN)
+        self._extreme = deque()
+
+        # 统计值缓存：同一时刻多个条件（如 T1/T2）共用一个窗口时只计算一次
+        self._dirty = True
+        self._cached_stat = None
+
+    @property
+    def window(self) -> List[Tuple[float, float]]:
+        """窗口内的 (timestamp, value) 列表（只读快照，按时间先后）"""
+        mask = self._mask
+        return [(float(self._times[seq & mask]), float(self._values[seq & mask]))
+                for seq in range(self._head, self._tail)]
+
+    def __len__(self) -> int:
+        return self._tail - self._head
+
+    def reset(self):
+        """清空窗口及全部增量状态（复用同一缓冲区，不重新分配）"""
+        self._head = 0
+        self._tail = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._nonfinite = 0
+        self._extreme.clear()
+        self._dirty = True
+
+    def _grow(self):
+        """缓冲区写满时容量翻倍，按新掩码重新摆放窗口内的序号"""
+        old_mask = self._mask
+        new_mask = (old_mask + 1) * 2 - 1
+        seqs = np.arange(self._head, self._tail)
+        old_slots, new_slots = seqs & old_mask, seqs & new_mask
+        for name in ('_times', '_rounded', '_values'):
+            old = getattr(self, name)
+            new = np.empty(new_mask + 1, dtype=old.dtype)
+            new[new_slots] = old[old_slots]
+            setattr(self, name, new)
+        self._mask = new_mask
+
     def _round(self, val):
         """辅助函数：四舍五入到固定精度以避免浮点数Bug"""
         return round(val, self._precision)
@@ -59,46 +183,113 @@ class SlidingWindow:
         cutoff_time_exclusive = self._round(timestamp - self.duration)
         
         # 2. 检查窗口
-        #    self.window[0][0] (1.01) <= cutoff_time_exclusive (1.01)
+        #    最早点的取整时间 (1.01) <= cutoff_time_exclusive (1.01)
         #    1.01 <= 1.01 -> True. 
         #    t=1.01 的点将被正确踢出。
         
-        while self.window and self._round(self.window[0][0]) <= cutoff_time_exclusive:
-            popped_item = self.window.popleft()
-            
-        self.window.append((timestamp, value))
+        mask = self._mask
+        rounded = self._rounded
+        values = self._values
+        head = self._head
+        tail = self._tail
+        while head < tail and rounded[head & mask] <= cutoff_time_exclusive:
+            old_value = float(values[head & mask])
+            if not math.isfinite(old_value):
+                self._nonfinite -= 1
+            else:
+                self._sum -= old_value
+                self._sum_sq -= old_value * old_value
+                if self._extreme and self._extreme[0][0] == head:
+                    self._extreme.popleft()
+            head += 1
+        self._head = head
+
+        if head == tail:
+            # 窗口已空（过期或被外部 reset），重置累加器，顺带消除浮点累积误差
+            self.reset()
+            tail = 0
+        elif tail - head > mask:
+            self._grow()
+            mask = self._mask
+
+        slot = tail & mask
+        self._times[slot] = timestamp
+        self._rounded[slot] = self._round(timestamp)
+        self._values[slot] = value
+        self._tail = tail + 1
+        self._dirty = True
+        if self._narrow:
+            # 累加器使用实际存储的（降精度后的）数值，与列式路径一致
+            value = float(self._values[slot])
+
+        if not math.isfinite(value):
+            self._nonfinite += 1
+            return
+        self._sum += value
+        self._sum_sq += value * value
+        if self._track_extreme:
+            extreme = self._extreme
+            if self._stat_id == _STAT_MAX:
+                while extreme and extreme[-1][1] < value:
+                    extreme.pop()
+            else:
+                while extreme and extreme[-1][1] > value:
+                    extreme.pop()
+            extreme.append((tail, value))
 
-    
     def calculate_statistic(self) -> Optional[float]:
-        """计算窗口内的统计值"""
-        if not self.window:
+        """计算窗口内的统计值（窗口未变化时直接返回上次结果）"""
+        if not self._dirty:
+            return self._cached_stat
+        self._cached_stat = self._compute_statistic()
+        self._dirty = False
+        return self._cached_stat
+
+    def _compute_statistic(self) -> Optional[float]:
+        count = self._tail - self._head
+        if not count:
             return None
-        
-        values = [item[1] for item in self.window]
-        
-        stat_lower = self.statistic_type.lower() if self.statistic_type else 'average'
-        
-        if stat_lower in ['average', '平均值', 'mean', 'avg']:
-            return float(np.mean(values))
-        elif stat_lower in ['max', '最大值', 'maximum']:
-            return float(np.max(values))
-        elif stat_lower in ['min', '最小值', 'minimum']:
-            return float(np.min(values))
-        elif stat_lower in ['rms', '有效值', 'rootmeansquare']:
-            return float(np.sqrt(np.mean(np.array(values) ** 2)))
+        if self._nonfinite:
+            return self._exact_statistic()
+        stat_id = self._stat_id
+        if stat_id == _STAT_MEAN:
+            return self._sum / count
+        elif stat_id == _STAT_MAX or stat_id == _STAT_MIN:
+            return float(self._extreme[0][1])
         else:
-            logger.warning(f"未知的统计类型: {self.statistic_type}，使用平均值代替")
-            return float(np.mean(values))
+            # 相消误差可能让平方和略小于0
+            return math.sqrt(max(self._sum_sq, 0.0) / count)
     
+    def _live_values(self) -> np.ndarray:
+        """窗口内数值：未跨越缓冲区末尾时直接返回切片视图，否则拼接两段"""
+        mask = self._mask
+        start = self._head & mask
+        stop = start + (self._tail - self._head)
+        if stop <= mask + 1:
+            return self._values[start:stop]
+        return np.concatenate((self._values[start:], self._values[:stop - mask - 1]))
+
+    def _exact_statistic(self) -> float:
+        """窗口含 NaN/inf 时按全量数据计算，保持与 NumPy 一致的传播语义"""
+        array = self._live_values()
+        stat_id = self._stat_id
+        if stat_id == _STAT_MAX:
+            return float(np.max(array))
+        elif stat_id == _STAT_MIN:
+            return float(np.min(array))
+        elif stat_id == _STAT_RMS:
+            return float(np.sqrt(np.mean(array ** 2)))
+        return float(np.mean(array))
+
     def get_oldest_value(self) -> Optional[float]:
-        if not self.window:
+        if self._head == self._tail:
             return None
-        return self.window[0][1]
+        return float(self._values[self._head & self._mask])
     
     def get_oldest_time(self) -> Optional[float]:
-        if not self.window:
+        if self._head == self._tail:
             return None
-        return self.window[0][0]
+        return float(self._times[self._head & self._mask])
 # class SlidingWindow:
 #     """滑动窗口计算器"""
     
@@ -149,12 +340,129 @@ class SlidingWindow:
 #         return self.window[0][0]
 
 
+# process_data_arrays 的向量化比较与分块扫描的起始块长
+_LOGIC_UFUNCS = {">": np.greater, "<": np.less, ">=": np.greater_equal, "<=": np.less_equal}
+_SCAN_BLOCK = 1024
+# 逐点路径使用的标量比较函数（__init__ 中按配置解析一次）
+_LOGIC_OPS = {">": operator.gt, "<": operator.lt, ">=": operator.ge, "<=": operator.le}
+
+
+def _sliding_extreme(values, starts, ends, is_max):
+    """
+    单调队列求每个区间 [starts[k], ends[k]) 的最大/最小值，O(N) 而非 O(N·窗口长)
+
+    starts、ends 均单调不减且区间非空；values 不得含 NaN（单调队列的比较对 NaN 无效）。
+    """
+    m = len(starts)
+    out = np.empty(m)
+    if m == 0:
+        return out
+    queue = np.empty(ends[m - 1] - starts[0], np.int64)  # 每个下标至多入队一次
+    head = 0
+    tail = 0
+    pushed = starts[0]
+    for k in range(m):
+        while pushed < ends[k]:
+            value = values[pushed]
+            if is_max:
+                while tail > head and values[queue[tail - 1]] < value:
+                    tail -= 1
+            else:
+                while tail > head and values[queue[tail - 1]] > value:
+                    tail -= 1
+            queue[tail] = pushed
+            tail += 1
+            pushed += 1
+        while queue[head] < starts[k]:
+            head += 1
+        out[k] = values[queue[head]]
+    return out
+
+
+if HAS_NUMBA:
+    _sliding_extreme = njit(cache=True)(_sliding_extreme)
+
+
+class _ArrayWindow:
+    """
+    列式滑动窗口（供 process_data_arrays 使用）
+
+    出队语义与 SlidingWindow 一致：第 i 点的窗口为 [start, i]，start 为第一个满足
+    round(t, p) > round(t_i - duration, p) 的下标，且不早于最近一次 reset 的位置。
+    统计值按下标区间整段向量化求出：平均值/有效值用前缀和，最大/最小值用 reduceat。
+    """
+
+    def __init__(self, window: SlidingWindow, lo: np.ndarray, values: np.ndarray):
+        self.statistic_type = window.statistic_type
+        self._stat_id = window._stat_id
+        self.lo = lo  # 见 window_starts，同一 (精度, 时长) 的窗口共用
+        self.values = values
+        self.floor = 0
+
+        # 含 NaN/inf 时前缀和会被污染，改为逐窗口 reduceat 求和
+        self._exact = not bool(np.isfinite(values).all())
+        if self._stat_id == _STAT_RMS:
+            values = np.square(values, dtype=np.float64)
+        if self._exact or self._stat_id in (_STAT_MAX, _STAT_MIN):
+            # 末尾补一个哨兵，reduceat 的区间终点可以取到 n
+            self._padded = np.append(values, 0.0)
+        else:
+            # 前缀和始终以 float64 累加，float32 输入也不损失精度
+            self._csum = np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+
+    @staticmethod
+    def window_starts(time_list: List[float], rounded_times: np.ndarray,
+                      duration: float, precision: int) -> np.ndarray:
+        """不考虑 reset 时每个点的窗口起点下标"""
+        n = len(time_list)
+        # round 必须与 SlidingWindow 一致（np.round 在 .5 边界上与内置 round 结果不同）
+        cutoffs = np.fromiter((round(t - duration, precision) for t in time_list), dtype=np.float64, count=n)
+        return np.minimum(np.searchsorted(rounded_times, cutoffs, side='right'), np.arange(n))
+
+    def reset(self, i: int):
+        """对应 SlidingWindow 清空：第 i 点之后重新开始累积"""
+        self.floor = i + 1
+
+    def _starts(self, a: int, b: int) -> np.ndarray:
+        return np.maximum(self.lo[a:b], self.floor)
+
+    def statistic_range(self, a: int, b: int) -> np.ndarray:
+        """第 a..b-1 点处窗口的统计值"""
+        stat_id = self._stat_id
+        starts = self._starts(a, b)
+        ends = np.arange(a + 1, b + 1)
+        if stat_id in (_STAT_MAX, _STAT_MIN):
+            if HAS_NUMBA and not self._exact:
+                return _sliding_extreme(self.values, starts, ends, stat_id == _STAT_MAX)
+            reduce = np.maximum if stat_id == _STAT_MAX else np.minimum
+            return reduce.reduceat(self._padded, np.column_stack((starts, ends)).ravel())[::2]
+        if self._exact:
+            total = np.add.reduceat(self._padded, np.column_stack((starts, ends)).ravel())[::2]
+        else:
+            total = self._csum[ends] - self._csum[starts]
+        counts = ends - starts
+        if stat_id == _STAT_RMS:
+            return np.sqrt(np.maximum(total, 0.0) / counts)
+        return total / counts
+
+    def oldest_range(self, a: int, b: int) -> np.ndarray:
+        """第 a..b-1 点处窗口最早的值"""
+        return self.values[self._starts(a, b)]
+
+
 class FunctionalCalculator:
     """功能计算器 - 状态机实现"""
     
-    def __init__(self, config: FunctionalCalcConfig):
+    def __init__(self, config: FunctionalCalcConfig, value_dtype=np.float64):
+        """
+        Args:
+            config: 功能计算配置
+            value_dtype: 窗口数值的存储精度。默认 float64；传 np.float32 可减半窗口内存与带宽，
+                但阈值附近的判定可能与 float64 结果相差一个采样点，时间戳始终为 float64
+        """
         self.config = config
-        self.state = "IDLE"
+        self._value_dtype = np.dtype(value_dtype)
+        self.state = IDLE
         self.startup_count = 0
         self.excel_row_index = 2
         self.current_cycle_data = {}
@@ -178,7 +486,7 @@ class FunctionalCalculator:
             statistic = config.time_base.get('statistic', '平均值')
             duration = config.time_base.get('duration', 1.0)
             key = f"time_base_{channel}"
-            self.windows[key] = SlidingWindow(duration, statistic)
+            self.windows[key] = SlidingWindow(duration, statistic, self._value_dtype)
             self._window_keys_to_channels.append((key, channel))
             self._baseline_channel_key = key # (V3.1) 记住T_Baseline的窗口key
         
@@ -187,14 +495,14 @@ class FunctionalCalculator:
             statistic = config.startup_time.get('statistic', '平均值')
             duration = config.startup_time.get('duration', 1.0)
             key = f"startup_time_{channel}"
-            self.windows[key] = SlidingWindow(duration, statistic)
+            self.windows[key] = SlidingWindow(duration, statistic, self._value_dtype)
             self._window_keys_to_channels.append((key, channel))
         
         if config.ignition_time:
             channel = config.ignition_time.get('channel')
             duration = config.ignition_time.get('duration', 10.0)
             key = f"ignition_time_{channel}"
-            self.difference_windows[key] = SlidingWindow(duration, '瞬时值')
+            self.difference_windows[key] = SlidingWindow(duration, '瞬时值', self._value_dtype)
             self._diff_window_keys_to_channels.append((key, channel))
         
         if config.rundown_ng:
@@ -202,7 +510,7 @@ class FunctionalCalculator:
             statistic = config.rundown_ng.get('statistic', '平均值')
             duration = config.rundown_ng.get('duration', 1.0)
             key = f"rundown_ng_{channel}"
-            self.windows[key] = SlidingWindow(duration, statistic)
+            self.windows[key] = SlidingWindow(duration, statistic, self._value_dtype)
             self._window_keys_to_channels.append((key, channel))
         
         if config.rundown_np:
@@ -210,294 +518,545 @@ class FunctionalCalculator:
             statistic = config.rundown_np.get('statistic', '平均值')
             duration = config.rundown_np.get('duration', 1.0)
             key = f"rundown_np_{channel}"
-            self.windows[key] = SlidingWindow(duration, statistic)
+            self.windows[key] = SlidingWindow(duration, statistic, self._value_dtype)
             self._window_keys_to_channels.append((key, channel))
         
+        # 条件检查所需的窗口/比较函数/阈值在此解析一次，逐点判断时不再查 config 字典
+        def window_check(condition, prefix, threshold_name='threshold', logic=None):
+            if not condition:
+                return None
+            key = f"{prefix}_{condition.get('channel')}"
+            logic = logic or condition.get('logic', '>')
+            return (key, self.windows[key], logic, self._logic_fn(logic),
+                    condition.get(threshold_name, 0.0))
+
+        self._startup_check = window_check(config.startup_time, 'startup_time')
+        self._time_base_check = window_check(config.time_base, 'time_base')
+        self._ng_t1_check = window_check(config.rundown_ng, 'rundown_ng', 'threshold1', '<')
+        self._ng_t2_check = window_check(config.rundown_ng, 'rundown_ng', 'threshold2', '<')
+        self._np_t1_check = window_check(config.rundown_np, 'rundown_np', 'threshold1', '<')
+        self._np_t2_check = window_check(config.rundown_np, 'rundown_np', 'threshold2', '<')
+        self._ignition_check = None
+        if config.ignition_time:
+            channel = config.ignition_time.get('channel')
+            key = f"ignition_time_{channel}"
+            logic = config.ignition_time.get('logic', '>')
+            self._ignition_check = (key, channel, self.difference_windows[key], logic,
+                                    self._logic_fn(logic), config.ignition_time.get('threshold', 0.0))
+
+        # 逐点路径的触发条件表：(位, 对应事件, 需要判断的状态掩码, 检查名, 预解析检查)
+        # 只列出已配置的条件；对应事件已捕获或当前状态用不到时跳过，不计算统计值
+        ramping = (1 << RAMPING_UP) | (1 << RAMPING_DOWN)
+        self._triggers = [
+            trigger for trigger in (
+                (TRIGGER_STARTUP, None, -1, "is_startup_time_met", self._startup_check),
+                (TRIGGER_BASELINE, 'T_Baseline', ramping, "is_time_base_met", self._time_base_check),
+                (TRIGGER_IGNITION, 'T_Ignition', ramping, "is_ignition_time_met", self._ignition_check),
+                (TRIGGER_NG_T1, 'T_Ng_T1', 1 << RAMPING_DOWN, "is_ng_rundown_T1_met", self._ng_t1_check),
+                (TRIGGER_NG_T2, 'T_Ng_T2', 1 << RAMPING_DOWN, "is_ng_rundown_T2_met", self._ng_t2_check),
+                (TRIGGER_NP_T1, 'T_Np_T1', 1 << RAMPING_DOWN, "is_np_rundown_T1_met", self._np_t1_check),
+                (TRIGGER_NP_T2, 'T_Np_T2', 1 << RAMPING_DOWN, "is_np_rundown_T2_met", self._np_t2_check),
+            ) if trigger[4] is not None
+        ]
+
+        # 逐点更新表：(通道, 绑定好的 update)，只含已配置的窗口
+        self._window_updaters = [
+            (channel, self.windows[key].update) for key, channel in self._window_keys_to_channels
+        ] + [
+            (channel, self.difference_windows[key].update) for key, channel in self._diff_window_keys_to_channels
+        ]
+
+        # 判定循环结束所需的 T2 事件
+        self._required_t2 = tuple(name for name, condition in (('T_Ng_T2', config.rundown_ng),
+                                                              ('T_Np_T2', config.rundown_np)) if condition)
+        # 同一组 T2 事件在触发位掩码中的表示，逐点路径按位比较判断循环结束
+        self._required_t2_mask = (TRIGGER_NG_T2 if config.rundown_ng else 0) | \
+                                 (TRIGGER_NP_T2 if config.rundown_np else 0)
+
         self.results = []
-        logger.info(f"功能计算器初始化完成，状态机状态: {self.state}")
+        logger.info(f"功能计算器初始化完成，状态机状态: {STATE_NAMES[self.state]}")
     
     def _update_all_windows(self, timestamp: float, data_point: Dict[str, float]):
         """在循环顶部统一更新所有窗口"""
-        for key, channel in self._window_keys_to_channels:
-            if channel in data_point:
-                self.windows[key].update(timestamp, data_point[channel])
-        
-        for key, channel in self._diff_window_keys_to_channels:
-            if channel in data_point:
-                self.difference_windows[key].update(timestamp, data_point[channel])
+        for channel, update in self._window_updaters:
+            value = data_point.get(channel)
+            if value is not None or channel in data_point:
+                update(timestamp, value)
                 
     def evaluate_logic(self, value: float, logic: str, threshold: float) -> bool:
         """评估逻辑条件"""
-        if logic == ">":
-            return value > threshold
-        elif logic == "<":
-            return value < threshold
-        elif logic == ">=":
-            return value >= threshold
-        elif logic == "<=":
-            return value <= threshold
-        else:
+        op = _LOGIC_OPS.get(logic)
+        if op is None:
             raise ValueError(f"不支持的逻辑操作: {logic}")
+        return op(value, threshold)
     
-    def is_startup_time_met(self) -> bool:
-        """检查startup_time条件是否满足"""
-        if not self.config.startup_time:
-            return False
-        config = self.config.startup_time
-        channel = config.get('channel')
-        key = f"startup_time_{channel}"
-        if key not in self.windows:
+    def _logic_fn(self, logic: str):
+        """逻辑操作符 -> 比较函数；不支持的操作符在求值时由 evaluate_logic 抛出 ValueError"""
+        fn = _LOGIC_OPS.get(logic)
+        if fn is None:
+            return lambda value, threshold: self.evaluate_logic(value, logic, threshold)
+        return fn
+
+    def _window_condition_met(self, check, name: str) -> bool:
+        """按预解析的 (key, 窗口, 逻辑, 比较函数, 阈值) 检查窗口统计值条件"""
+        if check is None:
             return False
-        window = self.windows[key]
+        key, window, logic, logic_fn, threshold = check
         stat_value = window.calculate_statistic()
         if stat_value is None:
             return False
-        logic = config.get('logic', '>')
-        threshold = config.get('threshold', 0.0)
-        result = self.evaluate_logic(stat_value, logic, threshold)
-        logger.debug(f"is_startup_time_met: ({key} Val: {stat_value:.2f}) {logic} {threshold}? -> {result}")
+        result = logic_fn(stat_value, threshold)
+        # 逐点调用：用 % 惰性格式化，DEBUG 关闭时不做字符串格式化
+        logger.debug("%s: (%s Val: %.2f) %s %s? -> %s", name, key, stat_value, logic, threshold, result)
         return result
+
+    def is_startup_time_met(self) -> bool:
+        """检查startup_time条件是否满足"""
+        return self._window_condition_met(self._startup_check, "is_startup_time_met")
     
     def is_time_base_met(self) -> bool:
         """检查time_base条件是否满足"""
-        if not self.config.time_base:
-            return False
-        config = self.config.time_base
-        channel = config.get('channel')
-        key = f"time_base_{channel}"
-        if key not in self.windows:
-            return False
-        window = self.windows[key]
-        stat_value = window.calculate_statistic()
-        if stat_value is None:
-            return False
-        logic = config.get('logic', '>')
-        threshold = config.get('threshold', 0.0)
-        result = self.evaluate_logic(stat_value, logic, threshold)
-        logger.debug(f"is_time_base_met: ({key} Val: {stat_value:.2f}) {logic} {threshold}? -> {result}")
-        return result
+        return self._window_condition_met(self._time_base_check, "is_time_base_met")
 
     
     def is_ignition_time_met(self, data_point: Dict[str, float]) -> bool:
         """检查ignition_time条件是否满足（差值计算）"""
-        if not self.config.ignition_time:
-            return False
-        config = self.config.ignition_time
-        channel = config.get('channel')
-        if channel not in data_point:
+        check = self._ignition_check
+        if check is None:
             return False
-        key = f"ignition_time_{channel}"
-        if key not in self.difference_windows:
+        key, channel, window, logic, logic_fn, threshold = check
+        # 缺通道的点只出现在按点回退路径上：命中时只做一次字典查找
+        try:
+            current_value = data_point[channel]
+        except KeyError:
             return False
-        window = self.difference_windows[key]
-        current_value = data_point[channel]
         oldest_value = window.get_oldest_value()
         if oldest_value is None:
             return False
         difference = current_value - oldest_value
-        logic = config.get('logic', '>')
-        threshold = config.get('threshold', 0.0)
-        result = self.evaluate_logic(difference, logic, threshold)
-        logger.debug(f"is_ignition_time_met: ({key} Diff: {difference:.2f}) {logic} {threshold}? -> {result}")
+        result = logic_fn(difference, threshold)
+        logger.debug("is_ignition_time_met: (%s Diff: %.2f) %s %s? -> %s", key, difference, logic, threshold, result)
         return result
 
     
     def is_ng_rundown_T1_met(self) -> bool:
         """检查rundown_ng的T1条件（threshold1）是否满足"""
-        if not self.config.rundown_ng:
-            return False
-        config = self.config.rundown_ng
-        channel = config.get('channel')
-        key = f"rundown_ng_{channel}"
-        if key not in self.windows:
-            return False
-        window = self.windows[key]
-        stat_value = window.calculate_statistic()
-        if stat_value is None:
-            return False
-        threshold1 = config.get('threshold1', 0.0)
-        result = stat_value < threshold1
-        logger.debug(f"is_ng_rundown_T1_met: ({key} Val: {stat_value:.2f}) < {threshold1}? -> {result}")
-        return result
+        return self._window_condition_met(self._ng_t1_check, "is_ng_rundown_T1_met")
 
     
     def is_ng_rundown_T2_met(self) -> bool:
         """检查rundown_ng的T2条件（threshold2）是否满足"""
-        if not self.config.rundown_ng:
-            return False
-        config = self.config.rundown_ng
-        channel = config.get('channel')
-        key = f"rundown_ng_{channel}"
-        if key not in self.windows:
-            return False
-        window = self.windows[key]
-        stat_value = window.calculate_statistic()
-        if stat_value is None:
-            return False
-        threshold2 = config.get('threshold2', 0.0)
-        result = stat_value < threshold2
-        logger.debug(f"is_ng_rundown_T2_met: ({key} Val: {stat_value:.2f}) < {threshold2}? -> {result}")
-        return result
+        return self._window_condition_met(self._ng_t2_check, "is_ng_rundown_T2_met")
 
     
     def is_np_rundown_T1_met(self) -> bool:
         """检查rundown_np的T1条件（threshold1）是否满足"""
-        if not self.config.rundown_np:
-            return False
-        config = self.config.rundown_np
-        channel = config.get('channel')
-        key = f"rundown_np_{channel}"
-        if key not in self.windows:
-            return False
-        window = self.windows[key]
-        stat_value = window.calculate_statistic()
-        if stat_value is None:
-            return False
-        threshold1 = config.get('threshold1', 0.0)
-        result = stat_value < threshold1
-        logger.debug(f"is_np_rundown_T1_met: ({key} Val: {stat_value:.2f}) < {threshold1}? -> {result}")
-        return result
+        return self._window_condition_met(self._np_t1_check, "is_np_rundown_T1_met")
 
     
     def is_np_rundown_T2_met(self) -> bool:
         """检查rundown_np的T2条件（threshold2）是否满足"""
-        if not self.config.rundown_np:
-            return False
-        config = self.config.rundown_np
-        channel = config.get('channel')
-        key = f"rundown_np_{channel}"
-        if key not in self.windows:
-            return False
-        window = self.windows[key]
-        stat_value = window.calculate_statistic()
-        if stat_value is None:
-            return False
-        threshold2 = config.get('threshold2', 0.0)
-        result = stat_value < threshold2
-        logger.debug(f"is_np_rundown_T2_met: ({key} Val: {stat_value:.2f}) < {threshold2}? -> {result}")
-        return result
+        return self._window_condition_met(self._np_t2_check, "is_np_rundown_T2_met")
 
     
+    def _evaluate_triggers(self, data_point: Dict[str, float]) -> int:
+        """一次性判断当前状态需要的全部触发条件，返回满足条件的位掩码"""
+        fired = 0
+        state_bit = 1 << self.state
+        cycle_data = self.current_cycle_data
+        for bit, event, state_mask, name, check in self._triggers:
+            if not state_mask & state_bit or event in cycle_data:
+                continue
+            if bit == TRIGGER_IGNITION:
+                met = self.is_ignition_time_met(data_point)
+            else:
+                met = self._window_condition_met(check, name)
+            if met:
+                fired |= bit
+        return fired
+
     def all_enabled_t2_events_found(self) -> bool:
         """检查所有启用的T2事件是否都已找到"""
-        if self.config.rundown_ng:
-            if 'T_Ng_T2' not in self.current_cycle_data:
-                return False
-        
-        if self.config.rundown_np:
-            if 'T_Np_T2' not in self.current_cycle_data:
+        cycle_data = self.current_cycle_data
+        if not self._required_t2:
+            # 未配置余转时，有任何事件即视为循环结束
+            return bool(cycle_data)
+        for name in self._required_t2:
+            if name not in cycle_data:
                 return False
-        
-        if not self.config.rundown_ng and not self.config.rundown_np:
-            if self.current_cycle_data:
-                return True
-            return False
-        
         return True
     
     def calculate_row(self):
         """计算并准备写入Excel的行数据"""
         self.startup_count += 1
         
-        calc_time_base = self.current_cycle_data.get('T_Baseline')
-        calc_start_time = None
-        calc_ignition_time = None
-        calc_ng_rundown = None
-        calc_np_rundown = None
-        
-        if calc_time_base is not None and self.current_cycle_data.get('T_Start') is not None:
-            calc_start_time = calc_time_base - self.current_cycle_data['T_Start']
-        
-        if calc_time_base is not None and self.current_cycle_data.get('T_Ignition') is not None:
-            calc_ignition_time = self.current_cycle_data['T_Ignition'] - calc_time_base
-        
-        if self.current_cycle_data.get('T_Ng_T1') is not None and self.current_cycle_data.get('T_Ng_T2') is not None:
-            calc_ng_rundown = self.current_cycle_data['T_Ng_T2'] - self.current_cycle_data['T_Ng_T1']
-        
-        if self.current_cycle_data.get('T_Np_T1') is not None and self.current_cycle_data.get('T_Np_T2') is not None:
-            calc_np_rundown = self.current_cycle_data['T_Np_T2'] - self.current_cycle_data['T_Np_T1']
-        
+        cycle_data = self.current_cycle_data
         new_row = {
             'startup_count': self.startup_count,
-            'time_base': calc_time_base,
-            'startup_time': calc_start_time,
-            'ignition_time': calc_ignition_time,
-            'ng_rundown': calc_ng_rundown,
-            'np_rundown': calc_np_rundown
+            'time_base': cycle_data.get('T_Baseline'),
         }
+        for column, end_event, start_event in _ROW_DIFFERENCES:
+            end_time = cycle_data.get(end_event)
+            start_time = cycle_data.get(start_event)
+            new_row[column] = None if end_time is None or start_time is None else end_time - start_time
         
         self.results.append(new_row)
         
         logger.info(f"计算完成循环 #{self.startup_count}: "
-                    f"时间={calc_time_base}, 启动时间={calc_start_time}, "
-                    f"点火时间={calc_ignition_time}, Ng余转={calc_ng_rundown}, "
-                    f"Np余转={calc_np_rundown}")
+                    f"时间={new_row['time_base']}, 启动时间={new_row['startup_time']}, "
+                    f"点火时间={new_row['ignition_time']}, Ng余转={new_row['ng_rundown']}, "
+                    f"Np余转={new_row['np_rundown']}")
         
         # (V2.5 修复)
         logger.debug("Resetting all sliding windows for the next cycle...")
-        for window in self.windows.values():
-            window.window.clear()
-        for window in self.difference_windows.values():
-            window.window.clear()
+        for window in chain(self.windows.values(), self.difference_windows.values()):
+            window.reset()
         
         # (V3.1 修复)
         self._last_baseline_value = -np.inf
 
         self.excel_row_index += 1
-        self.current_cycle_data = {}
-        self.state = "IDLE"
+        # 复用同一个字典：各处理路径持有的局部引用在循环之间始终有效
+        self.current_cycle_data.clear()
+        self.state = IDLE
     
+    def _stream_to_arrays(
+        self, data_stream: List[Tuple[float, Dict[str, float]]]
+    ) -> Optional[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+        """
+        将逐点数据流转为列式数组
+
+        仅在时间戳单调不减、且每个通道要么在所有点中出现要么都不出现时返回
+        (times, {channel: values})，否则返回 None，由调用方按点处理。
+        """
+        if not data_stream:
+            return None
+        n = len(data_stream)
+        channels = {channel for _, channel in self._window_keys_to_channels}
+        channels.update(channel for _, channel in self._diff_window_keys_to_channels)
+        first_point = data_stream[0][1]
+        try:
+            times = np.fromiter((timestamp for timestamp, _ in data_stream), dtype=np.float64, count=n)
+            channel_values = {}
+            for channel in channels:
+                if channel in first_point:
+                    channel_values[channel] = np.fromiter(
+                        (data_point[channel] for _, data_point in data_stream), dtype=np.float64, count=n
+                    )
+                elif any(channel in data_point for _, data_point in data_stream):
+                    return None
+        except (KeyError, TypeError, ValueError):
+            return None
+        if n > 1 and np.any(np.diff(times) < 0):
+            return None
+        return times, channel_values
+
+    def process_data_arrays(self, times: np.ndarray, channel_values: Dict[str, np.ndarray]):
+        """
+        列式入口：按整列数组执行状态机
+
+        各窗口的起点用 searchsorted 一次求出。状态机不逐点推进，而是按阶段跳转：
+        每个阶段的结束点（上升沿、基准峰值后首次下降、T2 全部出现）都在统计值数组上
+        用 argmax 找第一个满足条件的下标，阶段内的事件同样按区间一次查出。
+        结果与 process_data_stream 按点处理一致。
+
+        Args:
+            times: 时间戳数组 (N,)，必须单调不减
+            channel_values: {通道名: 数值数组 (N,)}；不在其中的通道视为没有数据
+        """
+        times = np.asarray(times, dtype=np.float64)
+        n = len(times)
+        logger.info(f"开始处理数据流，总点数: {n}")
+        if n > 1 and np.any(np.diff(times) < 0):
+            raise ValueError("process_data_arrays 要求时间戳单调不减")
+
+        time_list = times.tolist()
+        # 逐点 round 是列式路径中仅剩的 Python 级循环：按精度、按 (精度, 时长) 各只算一次
+        rounded_by_precision = {}
+        starts_by_shape = {}
+
+        def build(key_channels, windows):
+            array_windows = {}
+            for key, channel in key_channels:
+                if channel not in channel_values:
+                    continue
+                window = windows[key]
+                precision = window._precision
+                shape = (precision, window.duration)
+                lo = starts_by_shape.get(shape)
+                if lo is None:
+                    rounded_times = rounded_by_precision.get(precision)
+                    if rounded_times is None:
+                        rounded_times = np.fromiter(
+                            (round(t, precision) for t in time_list), dtype=np.float64, count=n
+                        )
+                        rounded_by_precision[precision] = rounded_times
+                    lo = _ArrayWindow.window_starts(time_list, rounded_times, window.duration, precision)
+                    starts_by_shape[shape] = lo
+                values = np.asarray(channel_values[channel]).astype(self._value_dtype, copy=False)
+                array_windows[key] = _ArrayWindow(window, lo, values)
+            return array_windows
+
+        array_windows = build(self._window_keys_to_channels, self.windows)
+        diff_windows = build(self._diff_window_keys_to_channels, self.difference_windows)
+        all_windows = list(array_windows.values()) + list(diff_windows.values())
+
+        # --- 条件：cond(a, b) 返回第 a..b-1 点是否满足的布尔数组，未配置时为 None ---
+        def compare(logic):
+            ufunc = _LOGIC_UFUNCS.get(logic)
+            if ufunc is None:
+                raise ValueError(f"不支持的逻辑操作: {logic}")
+            return ufunc
+
+        def logic_condition(config, prefix):
+            if not config:
+                return None
+            window = array_windows.get(f"{prefix}_{config.get('channel')}")
+            if window is None:
+                return None
+            logic = config.get('logic', '>')
+            threshold = config.get('threshold', 0.0)
+            return lambda a, b: compare(logic)(window.statistic_range(a, b), threshold)
+
+        def below_condition(config, prefix, threshold_name):
+            if not config:
+                return None
+            window = array_windows.get(f"{prefix}_{config.get('channel')}")
+            if window is None:
+                return None
+            threshold = config.get(threshold_name, 0.0)
+            return lambda a, b: window.statistic_range(a, b) < threshold
+
+        def ignition_condition(config):
+            if not config:
+                return None
+            window = diff_windows.get(f"ignition_time_{config.get('channel')}")
+            if window is None:
+                return None
+            logic = config.get('logic', '>')
+            threshold = config.get('threshold', 0.0)
+            values = window.values
+            return lambda a, b: compare(logic)(values[a:b] - window.oldest_range(a, b), threshold)
+
+        startup_cond = logic_condition(self.config.startup_time, 'startup_time')
+        baseline_cond = logic_condition(self.config.time_base, 'time_base')
+        ignition_cond = ignition_condition(self.config.ignition_time)
+        rundown_conds = [
+            ('T_Ng_T1', below_condition(self.config.rundown_ng, 'rundown_ng', 'threshold1')),
+            ('T_Ng_T2', below_condition(self.config.rundown_ng, 'rundown_ng', 'threshold2')),
+            ('T_Np_T1', below_condition(self.config.rundown_np, 'rundown_np', 'threshold1')),
+            ('T_Np_T2', below_condition(self.config.rundown_np, 'rundown_np', 'threshold2')),
+        ]
+        enabled_t2 = self._required_t2
+        baseline_window = array_windows.get(self._baseline_channel_key)
+
+        def first_true(mask_fn, a, last=n - 1):
+            """第 a..last 点中第一个满足 mask_fn 的下标，没有则返回 -1（分块倍增扫描）"""
+            block = _SCAN_BLOCK
+            while a <= last:
+                b = min(a + block, last + 1)
+                mask = mask_fn(a, b)
+                if mask.any():
+                    return a + int(np.argmax(mask))
+                a = b
+                block *= 2
+            return -1
+
+        def first_met(cond, a, last=n - 1):
+            return -1 if cond is None else first_true(cond, a, last)
+
+        def startup_met_at(i):
+            return startup_cond is not None and bool(startup_cond(i, i + 1)[0])
+
+        def capture_ignition(a, last, log_state=None):
+            if 'T_Ignition' in self.current_cycle_data:
+                return
+            j = first_met(ignition_cond, a, last)
+            if j >= 0:
+                self.current_cycle_data['T_Ignition'] = time_list[j]
+                if log_state:
+                    logger.info(f"[{log_state}] T_Ignition={time_list[j]:.3f}s")
+
+        cycle_data = self.current_cycle_data
+        i = 0
+        while i < n:
+            if self.state == IDLE:
+                # 启动条件的上升沿
+                previous = [self._startup_condition_was_true]
+
+                def rising_edge(a, b):
+                    met = startup_cond(a, b)
+                    was_met = np.empty_like(met)
+                    was_met[0] = previous[0]
+                    was_met[1:] = met[:-1]
+                    previous[0] = bool(met[-1])
+                    return met & ~was_met
+
+                j = first_met(startup_cond and rising_edge, i)
+                if j < 0:
+                    self._startup_condition_was_true = startup_met_at(n - 1)
+                    break
+                timestamp = time_list[j]
+                cycle_data['T_Start'] = timestamp
+                self.state = RAMPING_UP
+                logger.info(f"[IDLE->RAMPING_UP] T_Start={timestamp:.3f}s")
+                self._startup_condition_was_true = True
+                i = j + 1
+
+            elif self.state == RAMPING_UP:
+                peak_from = i
+                if 'T_Baseline' not in cycle_data:
+                    j = first_met(baseline_cond, i)
+                    if j < 0:
+                        capture_ignition(i, n - 1, "RAMPING_UP")
+                        self._startup_condition_was_true = startup_met_at(n - 1)
+                        break
+                    cycle_data['T_Baseline'] = time_list[j]
+                    logger.info(f"[RAMPING_UP] T_Baseline={time_list[j]:.3f}s")
+                    peak_from = j
+
+                # T_Baseline 之后，基准窗口统计值第一次下降处即为峰值已过
+                previous = [self._last_baseline_value]
+
+                def decreasing(a, b):
+                    current = baseline_window.statistic_range(a, b)
+                    last_values = np.empty_like(current)
+                    last_values[0] = previous[0]
+                    last_values[1:] = current[:-1]
+                    previous[0] = current[-1]
+                    return current < last_values
+
+                j = first_true(decreasing, peak_from)
+                capture_ignition(i, j if j >= 0 else n - 1, "RAMPING_UP")
+                if j < 0:
+                    self._last_baseline_value = float(previous[0])
+                    self._startup_condition_was_true = startup_met_at(n - 1)
+                    break
+                self._last_baseline_value = float(baseline_window.statistic_range(j, j + 1)[0])
+                self.state = RAMPING_DOWN
+                logger.info(f"[RAMPING_UP->RAMPING_DOWN] Peak detected. T={time_list[j]:.3f}s")
+                self._startup_condition_was_true = startup_met_at(j)
+                i = j + 1
+
+            elif self.state == RAMPING_DOWN:
+                # 先找循环结束点：所有启用的 T2 都出现的第一个点
+                found = {name: (i if name in cycle_data else first_met(cond, i))
+                         for name, cond in rundown_conds if name in enabled_t2}
+                if any(j < 0 for j in found.values()):
+                    end = -1
+                else:
+                    end = max(found.values(), default=i)
+                last = end if end >= 0 else n - 1
+
+                for name, cond in rundown_conds:
+                    if name in cycle_data:
+                        continue
+                    j = found[name] if name in found else first_met(cond, i, last)
+                    if 0 <= j <= last:
+                        cycle_data[name] = time_list[j]
+                        logger.info(f"[RAMPING_DOWN] {name}={time_list[j]:.3f}s")
+                if 'T_Baseline' not in cycle_data:
+                    j = first_met(baseline_cond, i, last)
+                    if j >= 0:
+                        cycle_data['T_Baseline'] = time_list[j]
+                capture_ignition(i, last)
+
+                if end < 0:
+                    self._startup_condition_was_true = startup_met_at(n - 1)
+                    break
+                # 循环结束点即出行：记下该点的启动条件后清空窗口，下一点起重新累积
+                self._startup_condition_was_true = startup_met_at(end)
+                self.calculate_row()
+                for window in all_windows:
+                    window.reset(end)
+                i = end + 1
+
+        self._finish_stream()
+
     def process_data_stream(self, data_stream: List[Tuple[float, Dict[str, float]]]):
-        """处理数据流，执行状态机逻辑"""
+        """
+        处理数据流，执行状态机逻辑
+
+        DataReader 产生的数据流（时间单调、各点通道一致）转为列式数组后交给
+        process_data_arrays；不满足条件的数据流按点处理。
+        """
+        arrays = self._stream_to_arrays(data_stream)
+        if arrays is not None:
+            self.process_data_arrays(*arrays)
+            return
+
         logger.info(f"开始处理数据流，总点数: {len(data_stream)}")
+        if data_stream:
+            # 入口处检查一次首点缺少的配置通道，而不是在逐点判断中逐一报告
+            first_point = data_stream[0][1]
+            configured = {channel for _, channel in self._window_keys_to_channels}
+            configured.update(channel for _, channel in self._diff_window_keys_to_channels)
+            missing = sorted(configured - first_point.keys())
+            if missing:
+                logger.warning(f"数据流首点缺少已配置通道 {missing}，相关条件在缺数据的点上视为不满足")
+
+        # 循环内不变的属性和绑定方法先取成局部变量，逐点不再做属性查找
+        window_updaters = self._window_updaters
+        evaluate_triggers = self._evaluate_triggers
+        # 本循环已捕获的 T2 位：T2 只在 RAMPING_DOWN 中判断且每循环只触发一次，
+        # 累积 fired 即与 current_cycle_data 中的 T2 事件一致
+        cycle_data = self.current_cycle_data
+        required_t2_mask = self._required_t2_mask
+        found_t2_mask = 0
+        for bit, name in ((TRIGGER_NG_T2, 'T_Ng_T2'), (TRIGGER_NP_T2, 'T_Np_T2')):
+            if name in cycle_data:
+                found_t2_mask |= bit
+        baseline_window = self.windows.get(self._baseline_channel_key)
         
         for timestamp, data_point in data_stream:
             
-            # 1. 统一更新所有窗口
-            self._update_all_windows(timestamp, data_point)
-            
-            is_startup_met = self.is_startup_time_met()
+            # 1. 统一更新所有窗口（同 _update_all_windows）
+            for channel, update in window_updaters:
+                value = data_point.get(channel)
+                if value is not None or channel in data_point:
+                    update(timestamp, value)
             
-            # (V2.8 修复)
-            is_baseline_met = self.is_time_base_met()
+            # 本点需要的条件一次判断完毕（已捕获的事件不再判断）
+            fired = evaluate_triggers(data_point)
+            is_startup_met = bool(fired & TRIGGER_STARTUP)
             
             # 2. 状态机逻辑
-            if self.state == "IDLE":
+            if self.state == IDLE:
                 # (V2.6 修复)
                 if is_startup_met and not self._startup_condition_was_true:
-                    self.current_cycle_data['T_Start'] = timestamp
-                    self.state = "RAMPING_UP"
+                    cycle_data['T_Start'] = timestamp
+                    self.state = RAMPING_UP
                     logger.info(f"[IDLE->RAMPING_UP] T_Start={timestamp:.3f}s")
             
-            elif self.state == "RAMPING_UP":
+            elif self.state == RAMPING_UP:
                 
                 # --- (!!!) 核心修复 V3.1 (开始) ---
                 
                 # 1. 捕获升速事件
-                if 'T_Start' not in self.current_cycle_data and is_startup_met:
-                    self.current_cycle_data['T_Start'] = timestamp
+                if 'T_Start' not in cycle_data and is_startup_met:
+                    cycle_data['T_Start'] = timestamp
                 
-                if 'T_Baseline' not in self.current_cycle_data and is_baseline_met:
-                    self.current_cycle_data['T_Baseline'] = timestamp
+                if fired & TRIGGER_BASELINE:
+                    cycle_data['T_Baseline'] = timestamp
                     logger.info(f"[RAMPING_UP] T_Baseline={timestamp:.3f}s")
                 
-                if 'T_Ignition' not in self.current_cycle_data and self.is_ignition_time_met(data_point):
-                    self.current_cycle_data['T_Ignition'] = timestamp
+                if fired & TRIGGER_IGNITION:
+                    cycle_data['T_Ignition'] = timestamp
                     logger.info(f"[RAMPING_UP] T_Ignition={timestamp:.3f}s")
                 
                 # 2. 检查是否切换到 RAMPING_DOWN
                 #    必须先确保 T_Baseline 至少被抓到过
-                if 'T_Baseline' in self.current_cycle_data:
+                if 'T_Baseline' in cycle_data:
                     
                     # (V3.1) 获取 T_Baseline 窗口的 *当前* 值
-                    current_baseline_value = self.windows[self._baseline_channel_key].calculate_statistic()
+                    current_baseline_value = baseline_window.calculate_statistic()
                     if current_baseline_value is None: current_baseline_value = -np.inf
                     
                     # 检查是否开始降速 (当前值 < 上一个值)
                     is_decreasing = (current_baseline_value < self._last_baseline_value)
                     
                     if is_decreasing:
-                        self.state = "RAMPING_DOWN"
+                        self.state = RAMPING_DOWN
                         logger.info(f"[RAMPING_UP->RAMPING_DOWN] Peak detected. T={timestamp:.3f}s")
                     
                     # 更新 "上一个值"
@@ -505,54 +1064,50 @@ class FunctionalCalculator:
 
                 # --- (!!!) 核心修复 V3.1 (结束) ---
             
-            elif self.state == "RAMPING_DOWN":
+            elif self.state == RAMPING_DOWN:
                 
                 # (V2.7 修复)
                 
-                # 捕获Ng T1
-                if 'T_Ng_T1' not in self.current_cycle_data and self.is_ng_rundown_T1_met():
-                    self.current_cycle_data['T_Ng_T1'] = timestamp
+                # 捕获 Ng/Np 的 T1、T2
+                if fired & TRIGGER_NG_T1:
+                    cycle_data['T_Ng_T1'] = timestamp
                     logger.info(f"[RAMPING_DOWN] T_Ng_T1={timestamp:.3f}s")
 
-                # 捕获Ng T2
-                if 'T_Ng_T2' not in self.current_cycle_data and self.is_ng_rundown_T2_met():
-                    self.current_cycle_data['T_Ng_T2'] = timestamp
+                if fired & TRIGGER_NG_T2:
+                    cycle_data['T_Ng_T2'] = timestamp
                     logger.info(f"[RAMPING_DOWN] T_Ng_T2={timestamp:.3f}s")
                 
-                # 捕获Np T1
-                if 'T_Np_T1' not in self.current_cycle_data and self.is_np_rundown_T1_met():
-                    self.current_cycle_data['T_Np_T1'] = timestamp
+                if fired & TRIGGER_NP_T1:
+                    cycle_data['T_Np_T1'] = timestamp
                     logger.info(f"[RAMPING_DOWN] T_Np_T1={timestamp:.3f}s")
                 
-                # 捕获Np T2
-                if 'T_Np_T2' not in self.current_cycle_data and self.is_np_rundown_T2_met():
-                    self.current_cycle_data['T_Np_T2'] = timestamp
+                if fired & TRIGGER_NP_T2:
+                    cycle_data['T_Np_T2'] = timestamp
                     logger.info(f"[RAMPING_DOWN] T_Np_T2={timestamp:.3f}s")
                 
                 # 补齐升速阶段未捕获的事件
-                if 'T_Baseline' not in self.current_cycle_data and is_baseline_met:
-                    self.current_cycle_data['T_Baseline'] = timestamp
+                if fired & TRIGGER_BASELINE:
+                    cycle_data['T_Baseline'] = timestamp
                 
-                if 'T_Ignition' not in self.current_cycle_data and self.is_ignition_time_met(data_point):
-                    self.current_cycle_data['T_Ignition'] = timestamp
+                if fired & TRIGGER_IGNITION:
+                    cycle_data['T_Ignition'] = timestamp
                 
-                # 检查循环是否结束
-                if self.all_enabled_t2_events_found():
-                    self.state = "CALCULATE_ROW"
-            
-            elif self.state == "CALCULATE_ROW":
-                self.calculate_row()
-                # 状态已在 calculate_row() 中切换到 IDLE
+                # 检查循环是否结束：当点直接出行，calculate_row() 清空窗口并切换到 IDLE
+                found_t2_mask |= fired & required_t2_mask
+                if (found_t2_mask == required_t2_mask) if required_t2_mask else cycle_data:
+                    self.calculate_row()
+                    found_t2_mask = 0
             
             # (V2.6 修复) 实时更新 "记忆"
             self._startup_condition_was_true = is_startup_met
 
-        
-        # 数据流结束时的处理
-        if self.state in ["RAMPING_UP", "RAMPING_DOWN"] and self.current_cycle_data:
+        self._finish_stream()
+
+    def _finish_stream(self):
+        """数据流结束时的处理"""
+        if self.state in (RAMPING_UP, RAMPING_DOWN) and self.current_cycle_data:
             if self.all_enabled_t2_events_found():
                 logger.warning("数据流结束，强制计算最后一个循环")
-                self.state = "CALCULATE_ROW"
                 self.calculate_row()
             else:
                  logger.warning("数据流结束，但最后一个循环未完成（T2未找到），已丢弃")
@@ -560,54 +1115,39 @@ class FunctionalCalculator:
         logger.info(f"数据处理完成，共识别 {len(self.results)} 个循环")
     
     def export_to_excel(self, output_path: str):
-        """导出结果到Excel文件"""
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "功能计算汇总表"
-        
-        headers = ["启动次数", "时间", "启动时间", "点火时间", "Ng余转时间", "Np余转时间"]
-        for col_idx, header in enumerate(headers, start=1):
-            cell = ws.cell(row=1, column=col_idx, value=header)
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-        
-        for row_data in self.results:
-            
-            # (V.2.3 版修改)
-            def format_value(value):
-                if value is None:
-                    return ""
-                else:
-                    return value
-            
-            # 启动次数显示为“第N次”
-            startup_count_display = f"第{row_data['startup_count']}次"
-            
-            row = [
-                startup_count_display,
-                format_value(row_data['time_base']),
-                format_value(row_data['startup_time']),
-                format_value(row_data['ignition_time']),
-                format_value(row_data['ng_rundown']),
-                format_value(row_data['np_rundown'])
-            ]
-            ws.append(row)
+        """导出结果到Excel文件（只写模式，逐行流式写入，不在内存中保留单元格对象）"""
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("功能计算汇总表")
         
+        # 只写模式下列宽须在写入行之前设置，样式须随单元格一起写入
         column_widths = [12, 15, 15, 15, 15, 15]
         for col_idx, width in enumerate(column_widths, start=1):
-            ws.column_dimensions[chr(64 + col_idx)].width = width
+            ws.column_dimensions[get_column_letter(col_idx)].width = width
 
         # 为整张表设置细边框与居中对齐
         thin = Side(style="thin", color="000000")
         border = Border(left=thin, right=thin, top=thin, bottom=thin)
-        max_row = ws.max_row
-        max_col = len(headers)
-        for r in range(1, max_row + 1):
-            for c in range(1, max_col + 1):
-                cell = ws.cell(row=r, column=c)
-                cell.border = border
-                cell.alignment = Alignment(horizontal='center', vertical='center')
+        center = Alignment(horizontal='center', vertical='center')
+
+        def styled(value, **style):
+            cell = WriteOnlyCell(ws, value=value)
+            cell.border = border
+            cell.alignment = center
+            for name, attr in style.items():
+                setattr(cell, name, attr)
+            return cell
+
+        headers = ["启动次数", "时间", "启动时间", "点火时间", "Ng余转时间", "Np余转时间"]
+        header_font = Font(bold=True)
+        header_fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+        ws.append([styled(header, font=header_font, fill=header_fill) for header in headers])
+        
+        # (V.2.3 版修改) None 显示为空单元格；启动次数显示为“第N次”
+        value_keys = ('time_base', 'startup_time', 'ignition_time', 'ng_rundown', 'np_rundown')
+        for row_data in self.results:
+            row = [styled(f"第{row_data['startup_count']}次")]
+            row.extend(styled("" if row_data[key] is None else row_data[key]) for key in value_keys)
+            ws.append(row)
         
         wb.save(output_path)
         logger.info(f"Excel文件已保存到: {output_path}")
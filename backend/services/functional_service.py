@@ -1,11 +1,16 @@
 """
 功能计算服务 - 统一的服务接口
 """
+import copy
 import json
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 import logging
 
+import numpy as np
+
 from backend.services.data_reader import DataReader
 from backend.services.functional_calculator import FunctionalCalculator, FunctionalCalcConfig
 
@@ -14,6 +19,13 @@ logger = logging.getLogger(__name__)
 
 class FunctionalService:
     """功能计算服务"""
+
+    # 配置解析缓存上限（按LRU淘汰）。合并报表复用模块级单例，但功能计算与配置对话路由
+    # 仍按请求新建服务实例，缓存放在类上才能被所有实例共享
+    CONFIG_CACHE_MAX_ENTRIES = 32
+    # (绝对路径, 文件大小, 修改时间ns) -> 解析后的配置
+    _config_cache: "OrderedDict[Tuple[str, int, int], FunctionalCalcConfig]" = OrderedDict()
+    _config_cache_lock = threading.Lock()
     
     def __init__(self):
         self.data_reader = DataReader()
@@ -37,17 +49,23 @@ class FunctionalService:
             # 2. 获取需要读取的通道列表
             channels = self._extract_channels(config)
             
-            # 3. 读取数据流
+            # 3. 读取列式数据（不再逐点构造字典再由计算器转回数组）
             logger.info(f"读取数据文件: {input_file_path}")
-            data_stream = self.data_reader.read_data_stream(
-                input_file_path,
-                channels
-            )
+            timestamps, values, channel_list = self.data_reader.read_data_frame(input_file_path, channels)
             
             # 4. 执行计算
             logger.info("开始功能计算...")
             calculator = FunctionalCalculator(config)
-            calculator.process_data_stream(data_stream)
+            if np.all(np.diff(timestamps) >= 0):
+                calculator.process_data_arrays(timestamps, {
+                    channel: np.ascontiguousarray(values[:, j]) for j, channel in enumerate(channel_list)
+                })
+            else:
+                # 时间戳乱序时只能按点处理
+                calculator.process_data_stream([
+                    (timestamp, dict(zip(channel_list, row)))
+                    for timestamp, row in zip(timestamps.tolist(), values.tolist())
+                ])
             
             # 5. 导出到Excel
             logger.info("导出Excel文件...")
@@ -85,7 +103,16 @@ class FunctionalService:
         return result
     
     def _load_config(self, config_path: str) -> FunctionalCalcConfig:
-        """加载配置"""
+        """加载配置（同一文件未修改时直接返回缓存的解析结果）"""
+        config_path_obj = Path(config_path)
+        stat = config_path_obj.stat()
+        cache_key = (str(config_path_obj.resolve()), stat.st_size, stat.st_mtime_ns)
+        with self._config_cache_lock:
+            cached = self._config_cache.get(cache_key)
+            if cached is not None:
+                self._config_cache.move_to_end(cache_key)
+                return copy.deepcopy(cached)
+
         with open(config_path, 'r', encoding='utf-8') as f:
             config_data = json.load(f)
         
@@ -102,27 +129,17 @@ class FunctionalService:
             rundown_ng=functional_calc.get('rundown_ng'),
             rundown_np=functional_calc.get('rundown_np')
         )
+
+        with self._config_cache_lock:
+            self._config_cache[cache_key] = copy.deepcopy(config)
+            if len(self._config_cache) > self.CONFIG_CACHE_MAX_ENTRIES:
+                self._config_cache.popitem(last=False)
         
         return config
     
     def _extract_channels(self, config: FunctionalCalcConfig) -> list:
         """从配置中提取所有需要的通道名称"""
-        channels = set()
-        
-        if config.time_base:
-            channels.add(config.time_base.get('channel'))
-        
-        if config.startup_time:
-            channels.add(config.startup_time.get('channel'))
-        
-        if config.ignition_time:
-            channels.add(config.ignition_time.get('channel'))
-        
-        if config.rundown_ng:
-            channels.add(config.rundown_ng.get('channel'))
-        
-        if config.rundown_np:
-            channels.add(config.rundown_np.get('channel'))
-        
-        return list(channels)
+        conditions = (config.time_base, config.startup_time, config.ignition_time,
+                      config.rundown_ng, config.rundown_np)
+        return list({condition.get('channel') for condition in conditions if condition})
 
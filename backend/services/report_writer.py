@@ -16,11 +16,11 @@ logger = logging.getLogger(__name__)
 
 
 class ReportWriter:
-    """报表生成器"""
-    
-    def __init__(self):
-        self.workbook = None
-        self.worksheet = None
+    """报表生成器
+
+    工作簿只保存在每次调用的局部变量中，不挂在实例上：同一实例可被多个报表并发使用
+    （合并报表服务在进程内共享子服务及其 ReportWriter）。
+    """
     
     def create_report(self, snapshots: List[Dict[str, Any]], output_path: str):
         """
@@ -31,13 +31,13 @@ class ReportWriter:
             output_path: 输出文件路径
         """
         # 创建Excel工作簿
-        self.workbook = openpyxl.Workbook()
-        self.worksheet = self.workbook.active
-        self.worksheet.title = "稳定状态快照"
+        workbook = openpyxl.Workbook()
+        worksheet = workbook.active
+        worksheet.title = "稳定状态快照"
         
         if not snapshots:
             logger.warning("没有快照数据")
-            self.workbook.save(output_path)
+            workbook.save(output_path)
             return
         
         # 获取所有显示通道
@@ -45,11 +45,11 @@ class ReportWriter:
         
         # 写入表头
         headers = ['时间'] + display_channels
-        self.worksheet.append(headers)
+        worksheet.append(headers)
         
         # 格式化表头：居中、加粗、背景色
         for col_idx in range(1, len(headers) + 1):
-            cell = self.worksheet.cell(row=1, column=col_idx)
+            cell = worksheet.cell(row=1, column=col_idx)
             cell.font = Font(bold=True)
             cell.alignment = Alignment(horizontal='center', vertical='center')
             cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
@@ -58,41 +58,41 @@ class ReportWriter:
         for snapshot in snapshots:
             timestamp = float(snapshot['timestamp'])  # 确保时间戳是数值
             row_values = [timestamp] + [float(snapshot['data'][ch]) for ch in display_channels]
-            self.worksheet.append(row_values)
+            worksheet.append(row_values)
 
             # 确保Excel单元格格式为数值格式
-            current_row = self.worksheet.max_row
+            current_row = worksheet.max_row
             # 时间列设置为数值格式
-            time_cell = self.worksheet.cell(row=current_row, column=1)
+            time_cell = worksheet.cell(row=current_row, column=1)
             time_cell.number_format = '0.000'
             # 通道数据列设置为数值格式
             for col_idx, _ in enumerate(display_channels, start=2):
-                data_cell = self.worksheet.cell(row=current_row, column=col_idx)
+                data_cell = worksheet.cell(row=current_row, column=col_idx)
                 data_cell.number_format = '0.00'
         
         # 设置全表格细边框与居中
         thin = Side(style="thin", color="000000")
         border = Border(left=thin, right=thin, top=thin, bottom=thin)
-        max_row = self.worksheet.max_row
+        max_row = worksheet.max_row
         max_col = len(headers)
         for r in range(1, max_row + 1):
             for c in range(1, max_col + 1):
-                cell = self.worksheet.cell(row=r, column=c)
+                cell = worksheet.cell(row=r, column=c)
                 cell.border = border
                 cell.alignment = Alignment(horizontal='center', vertical='center')
 
         logger.info(f"已写入 {len(snapshots)} 行数据")
         
         # 生成图表 - 已关闭
-        # self._create_chart(display_channels, len(snapshots))
+        # self._create_chart(worksheet, display_channels, len(snapshots))
         
         # 保存文件
         output_path_obj = Path(output_path)
         output_path_obj.parent.mkdir(parents=True, exist_ok=True)
-        self.workbook.save(output_path)
+        workbook.save(output_path)
         logger.info(f"报表已保存: {output_path}")
     
-    def _create_chart(self, channels: List[str], num_rows: int):
+    def _create_chart(self, worksheet, channels: List[str], num_rows: int):
         """创建折线图"""
         if num_rows <= 0:
             return
@@ -147,10 +147,10 @@ class ReportWriter:
             # 这里简化处理，将所有系列添加到同一个图表
             for idx, channel in enumerate(channels):
                 # X轴数据：时间列（第1列），跳过表头
-                x_values = Reference(self.worksheet, min_col=1, min_row=2, max_row=num_rows + 1)
+                x_values = Reference(worksheet, min_col=1, min_row=2, max_row=num_rows + 1)
                 
                 # Y轴数据：对应通道列（注意：min_row=2跳过表头，只包含数据）
-                y_values = Reference(self.worksheet, min_col=idx + 2, min_row=2, max_row=num_rows + 1)
+                y_values = Reference(worksheet, min_col=idx + 2, min_row=2, max_row=num_rows + 1)
                 
                 # 创建系列
                 series = Series(y_values, x_values, title=channel)
@@ -162,7 +162,7 @@ class ReportWriter:
             
             # 将图表添加到工作表
             chart_cell = f"A{num_rows + 3}"
-            self.worksheet.add_chart(chart, chart_cell)
+            worksheet.add_chart(chart, chart_cell)
             
             # 在图表添加后，通过 XML 操作移除网格线（更可靠的方法）
             try:
@@ -207,17 +207,17 @@ class ReportWriter:
             assessment_content_map = {}
         
         # 创建Excel工作簿
-        self.workbook = openpyxl.Workbook()
-        self.worksheet = self.workbook.active
-        self.worksheet.title = "状态评估表"
+        workbook = openpyxl.Workbook()
+        worksheet = workbook.active
+        worksheet.title = "状态评估表"
         
         # 写入表头
         headers = ['评估项目', '评估内容', '评估结论']
-        self.worksheet.append(headers)
+        worksheet.append(headers)
         
         # 格式化表头：居中、加粗、背景色
         for col_idx in range(1, len(headers) + 1):
-            cell = self.worksheet.cell(row=1, column=col_idx)
+            cell = worksheet.cell(row=1, column=col_idx)
             cell.font = Font(bold=True)
             cell.alignment = Alignment(horizontal='center', vertical='center')
             cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
@@ -249,13 +249,13 @@ class ReportWriter:
             
             # 写入数据行
             row_values = [assessment_name, assessment_content, conclusion]
-            self.worksheet.append(row_values)
+            worksheet.append(row_values)
             row_count += 1
             
             # 格式化数据行（单元格内容居中）
-            current_row = self.worksheet.max_row
+            current_row = worksheet.max_row
             for col_idx in range(1, len(headers) + 1):
-                cell = self.worksheet.cell(row=current_row, column=col_idx)
+                cell = worksheet.cell(row=current_row, column=col_idx)
                 cell.alignment = Alignment(horizontal='center', vertical='center')
                 
                 # 评估结论列：如果是"否"，可以设置特殊颜色
@@ -266,18 +266,18 @@ class ReportWriter:
                         cell.fill = PatternFill(start_color="CCFFCC", end_color="CCFFCC", fill_type="solid")
         
         # 调整列宽
-        self.worksheet.column_dimensions['A'].width = 30  # 评估项目
-        self.worksheet.column_dimensions['B'].width = 50  # 评估内容
-        self.worksheet.column_dimensions['C'].width = 15  # 评估结论
+        worksheet.column_dimensions['A'].width = 30  # 评估项目
+        worksheet.column_dimensions['B'].width = 50  # 评估内容
+        worksheet.column_dimensions['C'].width = 15  # 评估结论
         
         # 设置全表格细边框并统一居中
         thin = Side(style="thin", color="000000")
         border = Border(left=thin, right=thin, top=thin, bottom=thin)
-        max_row = self.worksheet.max_row
+        max_row = worksheet.max_row
         max_col = len(headers)
         for r in range(1, max_row + 1):
             for c in range(1, max_col + 1):
-                cell = self.worksheet.cell(row=r, column=c)
+                cell = worksheet.cell(row=r, column=c)
                 cell.border = border
                 # 不覆盖表头已有的居中，但确保所有单元格为居中
                 cell.alignment = Alignment(horizontal='center', vertical='center')
@@ -287,6 +287,6 @@ class ReportWriter:
         # 保存文件
         output_path_obj = Path(output_path)
         output_path_obj.parent.mkdir(parents=True, exist_ok=True)
-        self.workbook.save(output_path)
+        workbook.save(output_path)
         logger.info(f"状态评估报表已保存: {output_path}")
 
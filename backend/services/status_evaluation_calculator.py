@@ -159,10 +159,7 @@ class StatusEvaluationCalculator:
         
         value_to_check = None
         
-        # --- (!!!) V3.3.1 修复：
-        #    我把 'idx' 改成了 'condition_idx'
-        log_key = f"{eval_item.item}_cond{condition_idx}" # (日志)
-        # --- (修复结束) ---
+        # (日志) 逐点调用：日志键与消息均用 % 惰性格式化，DEBUG 关闭时不拼接字符串
         
         # 生成窗口键
         key = f"{eval_item.item}_cond{condition_idx}_{channel}_{statistic}_{duration}s"
@@ -178,7 +175,8 @@ class StatusEvaluationCalculator:
             oldest_val = window.get_oldest_value()
             
             if oldest_val is None:
-                logger.debug(f"evaluate_normal_condition [{log_key}]: (差值计算) 窗口未满. -> True (Normal)")
+                logger.debug("evaluate_normal_condition [%s_cond%s]: (差值计算) 窗口未满. -> True (Normal)",
+                             eval_item.item, condition_idx)
                 return True # 窗口未满，我们假设它是“正常”的
             
             value_to_check = current_val - oldest_val
@@ -197,7 +195,8 @@ class StatusEvaluationCalculator:
             value_to_check = window.calculate_statistic()
             
             if value_to_check is None:
-                logger.debug(f"evaluate_normal_condition [{log_key}]: ({statistic}) 窗口未满. -> True (Normal)")
+                logger.debug("evaluate_normal_condition [%s_cond%s]: (%s) 窗口未满. -> True (Normal)",
+                             eval_item.item, condition_idx, statistic)
                 return True # 窗口未满，同上，我们假设它是“正常”的
         
         # 评估逻辑条件 (e.g., 检查 "0 < 18000" 是否为 True)
@@ -205,8 +204,8 @@ class StatusEvaluationCalculator:
         
         # (V3.3.1 日志)
         logger.debug(
-            f"evaluate_normal_condition [{log_key}]: "
-            f"({statistic} Val: {value_to_check:.2f}) {logic} {threshold}? -> {result}"
+            "evaluate_normal_condition [%s_cond%s]: (%s Val: %.2f) %s %s? -> %s",
+            eval_item.item, condition_idx, statistic, value_to_check, logic, threshold, result
         )
         
         return result
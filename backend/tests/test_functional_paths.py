@@ -0,0 +1,136 @@
+"""
+功能计算两条处理路径的一致性测试
+process_data_stream 对时间单调、通道一致的数据流走列式路径 process_data_arrays，
+否则回退到按点处理；两条路径对同一输入必须得到完全相同的结果
+"""
+import sys
+import json
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent.parent  # 回到DRIA目录
+sys.path.insert(0, str(project_root))
+
+from backend.services.functional_calculator import FunctionalCalculator, FunctionalCalcConfig
+
+# 测试文件路径
+TEST_DATA_DIR = project_root / "backend" / "tests" / "test_data"
+DEFAULT_TEST_DATA_CSV = TEST_DATA_DIR / "test.csv"
+
+# 合成数据流的随机种子数量与统计方法取值范围
+SYNTHETIC_SEEDS = range(40)
+STATISTICS = ['平均值', '最大值', '最小值', '有效值']
+
+
+def run_calculator(config: FunctionalCalcConfig, data_stream, columnar: bool):
+    """按指定路径运行计算器，返回结果行列表"""
+    calculator = FunctionalCalculator(config)
+    if columnar:
+        # 确认该数据流确实会走列式路径，否则比较没有意义
+        assert calculator._stream_to_arrays(data_stream) is not None
+    else:
+        # 强制回退到按点处理
+        calculator._stream_to_arrays = lambda stream: None
+    calculator.process_data_stream(data_stream)
+    return calculator.results
+
+
+def load_functional_config(config_path: Path):
+    """从测试配置文件中读取 functionalCalc 部分，不存在时返回 None"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        calc_config_data = json.load(f).get('functionalCalc')
+    if not calc_config_data:
+        return None
+    return FunctionalCalcConfig(
+        time_base=calc_config_data.get('time_base'),
+        startup_time=calc_config_data.get('startup_time'),
+        ignition_time=calc_config_data.get('ignition_time'),
+        rundown_ng=calc_config_data.get('rundown_ng'),
+        rundown_np=calc_config_data.get('rundown_np')
+    )
+
+
+def load_csv_stream(data_path: Path, time_col: str = 'time[s]'):
+    """把测试CSV转换为 (时间戳, {通道: 数值}) 数据流"""
+    df = pd.read_csv(data_path, encoding='utf-8-sig')
+    data_stream = []
+    for row in df.to_dict('records'):
+        timestamp = row.pop(time_col)
+        data_stream.append((timestamp, row))
+    return data_stream
+
+
+def make_synthetic_case(seed: int):
+    """生成含多个启动循环的合成数据流及随机配置（少量 NaN，部分条件未配置）"""
+    rng = np.random.default_rng(seed)
+    dt = float(rng.choice([0.01, 0.02, 0.05]))
+    n = int(rng.integers(500, 3000))
+    t = np.round(np.arange(n) * dt, 2)
+    phase = (t % rng.uniform(3, 10)) / 10
+    ng = 10000 * np.sin(np.pi * np.clip(phase * 1.5, 0, 1)) + rng.uniform(0, 300) * rng.standard_normal(n)
+    np_ = 8000 * np.sin(np.pi * np.clip(phase * 1.3, 0, 1)) + 100 * rng.standard_normal(n)
+    temp = np.cumsum(rng.standard_normal(n)) * 5 + 300
+    if seed % 4 == 0:
+        ng[rng.integers(0, n, size=3)] = np.nan
+    data_stream = [
+        (float(a), {'Ng': float(b), 'Np': float(c), 'T': float(d)})
+        for a, b, c, d in zip(t, ng, np_, temp)
+    ]
+
+    def duration():
+        return float(rng.choice([0.05, 0.1, 0.3, 1.0]))
+
+    def maybe(probability, condition):
+        return condition if rng.random() < probability else None
+
+    config = FunctionalCalcConfig(
+        time_base=maybe(0.9, {'channel': 'Ng', 'statistic': str(rng.choice(STATISTICS)), 'duration': duration(),
+                              'logic': str(rng.choice(['>', '>='])), 'threshold': float(rng.uniform(2000, 8000))}),
+        startup_time=maybe(0.9, {'channel': str(rng.choice(['Ng', 'Np'])), 'statistic': str(rng.choice(STATISTICS)),
+                                 'duration': duration(), 'logic': '>', 'threshold': float(rng.uniform(100, 2000))}),
+        ignition_time=maybe(0.8, {'channel': 'T', 'type': 'difference', 'duration': duration(),
+                                  'logic': str(rng.choice(['>', '<'])), 'threshold': float(rng.uniform(-5, 5))}),
+        rundown_ng=maybe(0.8, {'channel': 'Ng', 'statistic': str(rng.choice(STATISTICS)), 'duration': duration(),
+                               'threshold1': float(rng.uniform(3000, 6000)), 'threshold2': float(rng.uniform(100, 3000))}),
+        rundown_np=maybe(0.7, {'channel': 'Np', 'statistic': str(rng.choice(STATISTICS)), 'duration': duration(),
+                               'threshold1': float(rng.uniform(3000, 6000)), 'threshold2': float(rng.uniform(100, 3000))}),
+    )
+    return config, data_stream
+
+
+def test_paths_match_on_test_data():
+    """test_data 下所有功能计算配置在 test.csv 上两条路径结果一致"""
+    data_stream = load_csv_stream(DEFAULT_TEST_DATA_CSV)
+    total_cycles = 0
+    for config_path in sorted(TEST_DATA_DIR.glob("*.json")):
+        config = load_functional_config(config_path)
+        if config is None:
+            continue
+        columnar = run_calculator(config, data_stream, columnar=True)
+        per_point = run_calculator(config, data_stream, columnar=False)
+        assert columnar == per_point, f"{config_path.name}: 列式路径与按点路径结果不一致"
+        total_cycles += len(columnar)
+    assert total_cycles > 0, "测试数据未识别到任何循环"
+
+
+def test_paths_match_on_synthetic_streams():
+    """合成的多循环数据流上两条路径结果一致"""
+    total_cycles = 0
+    for seed in SYNTHETIC_SEEDS:
+        config, data_stream = make_synthetic_case(seed)
+        columnar = run_calculator(config, data_stream, columnar=True)
+        per_point = run_calculator(config, data_stream, columnar=False)
+        assert columnar == per_point, f"seed={seed}: 列式路径与按点路径结果不一致"
+        total_cycles += len(columnar)
+    assert total_cycles > len(SYNTHETIC_SEEDS), "合成数据流识别到的循环过少"
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    test_paths_match_on_test_data()
+    test_paths_match_on_synthetic_streams()
+    print("[OK] 列式路径与按点路径结果一致")